@@ -1,212 +1,341 @@
 #!/usr/bin/env python3
 """
 Comprehensive Stock Analysis - Technical, Fundamental, Capital Flow, and Macro Analysis.
-Usage: python stock_analysis.py <SYMBOL> [--market HK|US|CN]
+Usage: python stock_analysis.py <SYMBOL[,SYMBOL...]> [--market HK|US|CN]
 Example: python stock_analysis.py NVDA --market US
          python stock_analysis.py 0700.HK --market HK
+         python stock_analysis.py NVDA,AAPL,MSFT --market US
 """
 
 import sys
 import os
 import json
-import re
-from datetime import datetime, timedelta
-import urllib.request
+import gzip
+import pickle
+import time
+from array import array
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate
+from types import MappingProxyType
+
+from stock_http import http_get_json
 
 CACHE_DIR = os.path.expanduser("~/.cache/stock_data")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-def get_cache_path(symbol):
-    return os.path.join(CACHE_DIR, f"{symbol.replace('.', '_')}_full.json")
-
-def load_cache(symbol, hours=1):
-    cache_path = get_cache_path(symbol)
-    if os.path.exists(cache_path):
-        file_age = os.path.getmtime(cache_path)
-        age_hours = (datetime.now().timestamp() - file_age) / 3600
-        if age_hours < hours:
-            with open(cache_path) as f:
-                return json.load(f)
+@lru_cache(maxsize=4096)
+def cache_key(symbol):
+    """File-name form of a symbol, e.g. 0700.HK -> 0700_HK"""
+    return symbol.replace('.', '_')
+
+def get_cache_path(symbol, section):
+    """Each section (technical, fundamental) has its own file, so a hit only loads what it needs"""
+    return os.path.join(CACHE_DIR, f"{cache_key(symbol)}_{section}.pkl.gz")
+
+def get_legacy_cache_path(symbol):
+    """Combined JSON cache written by earlier versions; still read until it expires"""
+    return os.path.join(CACHE_DIR, f"{cache_key(symbol)}_full.json")
+
+def read_cache_file(cache_path):
+    if cache_path.endswith('.json'):
+        with open(cache_path) as f:
+            return json.load(f)
+    with gzip.open(cache_path, 'rb') as f:
+        return pickle.load(f)
+
+def load_cache(symbol, section, hours=1):
+    section_path = get_cache_path(symbol, section)
+    for cache_path in (section_path, get_legacy_cache_path(symbol)):
+        # A single stat() gives both existence and age
+        try:
+            file_age = os.stat(cache_path).st_mtime
+        except FileNotFoundError:
+            continue
+        if (time.time() - file_age) / 3600 < hours:
+            data = read_cache_file(cache_path)
+            return data if cache_path == section_path else data.get(section)
     return None
 
-def save_cache(symbol, data):
-    cache_path = get_cache_path(symbol)
-    with open(cache_path, 'w') as f:
-        json.dump(data, f, indent=2)
+def save_cache(symbol, section, data):
+    cache_path = get_cache_path(symbol, section)
+    with gzip.open(cache_path, 'wb', compresslevel=1) as f:
+        pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
 
 # ==================== TECHNICAL ANALYSIS ====================
 
+def _ema_loop(prices, alpha, seed):
+    ema = seed
+    for price in prices:
+        ema += (price - ema) * alpha
+    return ema
+
+def _indicator_pass(closes, rsi_period=14, fast=12, slow=26, bb_period=20):
+    """
+    Walk closes once for every indicator.
+    At a few hundred bars the cost is per-element interpreter overhead, not
+    arithmetic, so RSI, both EMAs, drawdown, return moments and the Bollinger
+    window sums share one loop.
+    Returns (avg_gain, avg_loss, ema_fast, ema_slow, max_dd, ret_mean, ret_m2,
+    bb_sum, bb_sq); the Bollinger sums are of closes minus the last close.
+    """
+    n = len(closes)
+    a_fast, a_slow = 2 / (fast + 1), 2 / (slow + 1)
+    # EMAs are seeded with the SMA of their first window
+    ema_fast = sum(closes[:fast]) / fast if n >= fast else None
+    ema_slow = sum(closes[:slow]) / slow if n >= slow else None
+    avg_gain = avg_loss = max_dd = ret_mean = ret_m2 = bb_sum = bb_sq = 0.0
+    # Shifting by the last close keeps the sum of squares free of cancellation
+    bb_start, shift = n - bb_period, closes[-1]
+    if bb_start <= 0:
+        bb_sum, bb_sq = closes[0] - shift, (closes[0] - shift) ** 2
+    peak = prev = closes[0]
+    for i in range(1, n):
+        price = closes[i]
+        change = price - prev
+        # Wilder smoothing: SMA of the first period changes, then smoothed
+        gain, loss = (change, 0.0) if change > 0 else (0.0, -change)
+        if i <= rsi_period:
+            avg_gain += gain / rsi_period
+            avg_loss += loss / rsi_period
+        else:
+            avg_gain = (avg_gain * (rsi_period - 1) + gain) / rsi_period
+            avg_loss = (avg_loss * (rsi_period - 1) + loss) / rsi_period
+        if i >= fast: ema_fast += (price - ema_fast) * a_fast
+        if i >= slow: ema_slow += (price - ema_slow) * a_slow
+        # Drawdown is measured from the running peak, not the period high
+        if price > peak: peak = price
+        elif (peak - price) / peak > max_dd: max_dd = (peak - price) / peak
+        # Welford running mean / squared deviations of daily returns
+        ret = change / prev
+        delta = ret - ret_mean
+        ret_mean += delta / i
+        ret_m2 += delta * (ret - ret_mean)
+        if i >= bb_start:
+            bb_sum += price - shift
+            bb_sq += (price - shift) ** 2
+        prev = price
+    return avg_gain, avg_loss, ema_fast, ema_slow, max_dd, ret_mean, ret_m2, bb_sum, bb_sq
+
 def moving_average(data, period):
     if len(data) < period: return None
     return sum(data[-period:]) / period
 
+def window_mean(sums, period):
+    """Mean of the last period values, read from prefix sums (sums[i] = sum(data[:i]))"""
+    n = len(sums) - 1
+    if n < period: return None
+    return (sums[n] - sums[n - period]) / period
+
 def exponential_moving_average(data, period):
     if len(data) < period: return None
-    multiplier = 2 / (period + 1)
-    ema = data[-period]
-    for price in data[-period:]:
-        ema = price * multiplier + ema * (1 - multiplier)
-    return ema
+    # Seed with the SMA of the first window, then run the recurrence over the rest
+    return _ema_loop(data[period:], 2 / (period + 1), sum(data[:period]) / period)
 
-def rsi(prices, period=14):
-    if len(prices) < period + 1: return None
-    gains, losses = [], []
-    for i in range(1, len(prices)):
-        change = prices[i] - prices[i-1]
-        gains.append(change if change > 0 else 0)
-        losses.append(abs(change) if change < 0 else 0)
-    avg_gain = sum(gains[-period:]) / period
-    avg_loss = sum(losses[-period:]) / period
-    if avg_loss == 0: return 100
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-def macd(prices, fast=12, slow=26):
-    ema_fast = exponential_moving_average(prices, fast)
-    ema_slow = exponential_moving_average(prices, slow)
-    if ema_fast is None or ema_slow is None: return None, None
-    return ema_fast - ema_slow, exponential_moving_average(prices[-26:], 9)
-
-def bollinger_bands(prices, period=20):
-    if len(prices) < period: return None, None, None
-    sma = moving_average(prices, period)
-    variance = sum((p - sma) ** 2 for p in prices[-period:]) / period
-    std = variance ** 0.5
+def bollinger_bands(bb_sum, bb_sq, shift, period=20):
+    """Bands from the shifted window sums returned by _indicator_pass"""
+    mean = bb_sum / period
+    std = max(bb_sq / period - mean * mean, 0.0) ** 0.5
+    sma = shift + mean
     return sma + (2 * std), sma, sma - (2 * std)
 
-def volatility(returns):
-    if len(returns) < 2: return None
-    daily_vol = ((sum((r - sum(returns)/len(returns))**2 for r in returns) / (len(returns) - 1)) ** 0.5)
-    return daily_vol * (252 ** 0.5) * 100
-
-def max_drawdown(prices):
-    max_price = max(prices)
-    return max((max_price - p) / max_price for p in prices) * 100
-
-def daily_returns(closes):
-    return [(closes[i] - closes[i-1]) / closes[i-1] for i in range(1, len(closes))]
-
-def sharpe_ratio(returns, rf=0.02):
-    if len(returns) < 2: return None
-    avg_ret = sum(returns) / len(returns) * 252
-    std = ((sum((r - avg_ret/252)**2 for r in returns)) ** 0.5) * (252 ** 0.5)
-    if std == 0: return None
-    return (avg_ret - rf) / std
+@dataclass(slots=True)
+class TechnicalResult:
+    """Price history and indicators produced by fetch_technical_data()"""
+    symbol: str
+    currency: str
+    current_price: float
+    week52_high: float | None
+    week52_low: float | None
+    closes: array
+    volumes: array
+    ma5: float | None
+    ma20: float | None
+    ma60: float | None
+    rsi14: float | None
+    macd: float | None
+    macd_signal: float | None
+    bb_upper: float | None
+    bb_middle: float | None
+    bb_lower: float | None
+    volatility: float | None
+    max_drawdown: float
+    sharpe: float | None
+    avg_volume: float
+    avg_volume_5d: float
 
 # ==================== DATA FETCHING ====================
 
 def fetch_technical_data(symbol):
     """Fetch from Yahoo Finance"""
-    cached = load_cache(symbol, hours=1)
-    if cached and 'technical' in cached:
-        print(f"Using cached technical data for {symbol}")
-        return cached['technical']
+    cached = load_cache(symbol, 'technical', hours=1)
+    if cached:
+        try:
+            tech = TechnicalResult(**cached)
+            print(f"Using cached technical data for {symbol}")
+            return tech
+        except TypeError:
+            pass  # Cached by a version with different fields; refetch
     
     url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1mo"
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    
-    with urllib.request.urlopen(req, timeout=15) as response:
-        data = json.loads(response.read().decode())
+    data = http_get_json(url)
     
     if 'result' not in data['chart'] or not data['chart']['result']:
         raise ValueError(f"No data for {symbol}")
     
     result = data['chart']['result'][0]
     meta = result['meta']
-    closes = [c for c in result['indicators']['quote'][0]['close'] if c]
-    volumes = [v for v in result['indicators']['quote'][0]['volume'] if v]
-    
-    returns = daily_returns(closes)
-    
-    tech = {
-        'symbol': meta.get('symbol', symbol),
-        'currency': meta.get('currency', 'USD'),
-        'current_price': meta.get('regularMarketPrice', closes[-1]),
-        '52w_high': meta.get('fiftyTwoWeekHigh'),
-        '52w_low': meta.get('fiftyTwoWeekLow'),
-        'closes': closes,
-        'volumes': volumes,
-        'ma5': moving_average(closes, 5),
-        'ma20': moving_average(closes, 20),
-        'ma60': moving_average(closes, 60) if len(closes) >= 60 else None,
-        'rsi14': rsi(closes, 14),
-        'macd': macd(closes)[0],
-        'macd_signal': macd(closes)[1],
-        'bb_upper': bollinger_bands(closes)[0],
-        'bb_middle': bollinger_bands(closes)[1],
-        'bb_lower': bollinger_bands(closes)[2],
-        'volatility': volatility(returns),
-        'max_drawdown': max_drawdown(closes),
-        'sharpe': sharpe_ratio(returns),
-        'avg_volume': sum(volumes[-15:]) / 15 if len(volumes) >= 15 else sum(volumes) / len(volumes),
-    }
-    
-    result = {'technical': tech}
-    save_cache(symbol, result)
+    quote = result['indicators']['quote'][0]
+    # Yahoo reports missing bars as null; a 0 volume (halted session) is a real value
+    # Packed doubles pickle as a single buffer instead of one float object per bar
+    closes = array('d', (c for c in quote['close'] if c is not None))
+    volumes = array('d', (v for v in quote['volume'] if v is not None))
+    
+    # One running-sum pass serves every moving-average window
+    sums = list(accumulate(closes, initial=0))
+    (avg_gain, avg_loss, ema_fast, ema_slow, max_dd,
+     ret_mean, ret_m2, bb_sum, bb_sq) = _indicator_pass(closes)
+    n_ret = len(closes) - 1
+    
+    rsi14 = None
+    if n_ret >= 14:
+        rsi14 = 100 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    macd_val = macd_sig = None
+    if ema_slow is not None:
+        macd_val, macd_sig = ema_fast - ema_slow, exponential_moving_average(closes[-26:], 9)
+    vol = sharpe = None
+    if n_ret >= 2:
+        daily_std = (ret_m2 / (n_ret - 1)) ** 0.5
+        vol = daily_std * (252 ** 0.5) * 100
+        if daily_std:
+            sharpe = (ret_mean * 252 - 0.02) / (daily_std * (252 ** 0.5))
+    bb_upper = bb_middle = bb_lower = None
+    if len(closes) >= 20:
+        bb_upper, bb_middle, bb_lower = bollinger_bands(bb_sum, bb_sq, closes[-1])
+    
+    tech = TechnicalResult(
+        symbol=meta.get('symbol', symbol),
+        currency=meta.get('currency', 'USD'),
+        current_price=meta.get('regularMarketPrice', closes[-1]),
+        week52_high=meta.get('fiftyTwoWeekHigh'),
+        week52_low=meta.get('fiftyTwoWeekLow'),
+        closes=closes,
+        volumes=volumes,
+        ma5=window_mean(sums, 5),
+        ma20=window_mean(sums, 20),
+        ma60=window_mean(sums, 60),
+        rsi14=rsi14,
+        macd=macd_val,
+        macd_signal=macd_sig,
+        bb_upper=bb_upper,
+        bb_middle=bb_middle,
+        bb_lower=bb_lower,
+        volatility=vol,
+        max_drawdown=max_dd * 100,
+        sharpe=sharpe,
+        avg_volume=sum(volumes[-15:]) / 15 if len(volumes) >= 15 else sum(volumes) / len(volumes),
+        avg_volume_5d=sum(volumes[-5:]) / 5,
+    )
+    
+    save_cache(symbol, 'technical', asdict(tech))
     return tech
 
+def raw_value(section, key):
+    """Unwrap a Yahoo {'raw': ..., 'fmt': ...} field; None when the field is absent"""
+    field = section.get(key)
+    return field.get('raw') if field else None
+
 def fetch_fundamental_data_hk(symbol):
     """Fetch fundamental data for HK stocks from Yahoo Finance"""
+    cached = load_cache(symbol, 'fundamental')
+    if cached is not None:
+        return cached
+    
     try:
         info_url = f"https://query1.finance.yahoo.com/v10/finance/quoteSummary/{symbol}?modules=defaultKeyStatistics,financialData"
-        req = urllib.request.Request(info_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
+        data = http_get_json(info_url)
         
         summary = data.get('quoteSummary', {}).get('result', [{}])[0]
         
         fd = summary.get('financialData', {})
         kvs = summary.get('defaultKeyStatistics', {})
         
-        return {
-            'pe_ratio': kvs.get('trailingPE', {}).get('raw'),
-            'forward_pe': kvs.get('forwardPE', {}).get('raw'),
-            'market_cap': kvs.get('marketCap', {}).get('raw'),
-            'dividend_yield': kvs.get('dividendYield', {}).get('raw'),
-            'profit_margin': fd.get('profitMargins', {}).get('raw'),
-            'revenue_growth': fd.get('revenueGrowth', {}).get('raw'),
-            'ebitda': fd.get('ebitda', {}).get('raw'),
-            'debt_to_equity': fd.get('debtToEquity', {}).get('raw'),
-            'roe': fd.get('returnOnEquity', {}).get('raw'),
-            'beta': kvs.get('beta', {}).get('raw'),
+        fund = {
+            'pe_ratio': raw_value(kvs, 'trailingPE'),
+            'forward_pe': raw_value(kvs, 'forwardPE'),
+            'market_cap': raw_value(kvs, 'marketCap'),
+            'dividend_yield': raw_value(kvs, 'dividendYield'),
+            'profit_margin': raw_value(fd, 'profitMargins'),
+            'revenue_growth': raw_value(fd, 'revenueGrowth'),
+            'ebitda': raw_value(fd, 'ebitda'),
+            'debt_to_equity': raw_value(fd, 'debtToEquity'),
+            'roe': raw_value(fd, 'returnOnEquity'),
+            'beta': raw_value(kvs, 'beta'),
         }
+        save_cache(symbol, 'fundamental', fund)
+        return fund
     except Exception as e:
         print(f"Fundamental data fetch error: {e}")
         return {}
 
 def fetch_fundamental_data_us(symbol):
     """Fetch fundamental data for US stocks"""
+    cached = load_cache(symbol, 'fundamental')
+    if cached is not None:
+        return cached
+    
     try:
         info_url = f"https://query1.finance.yahoo.com/v10/finance/quoteSummary/{symbol}?modules=defaultKeyStatistics,financialData"
-        req = urllib.request.Request(info_url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=15) as response:
-            data = json.loads(response.read().decode())
+        data = http_get_json(info_url)
         
         summary = data.get('quoteSummary', {}).get('result', [{}])[0]
         fd = summary.get('financialData', {})
         kvs = summary.get('defaultKeyStatistics', {})
         
-        return {
-            'pe_ratio': kvs.get('trailingPE', {}).get('raw'),
-            'forward_pe': kvs.get('forwardPE', {}).get('raw'),
-            'market_cap': kvs.get('marketCap', {}).get('raw'),
-            'peg_ratio': kvs.get('pegRatio', {}).get('raw'),
-            'profit_margin': fd.get('profitMargins', {}).get('raw'),
-            'revenue_growth': fd.get('revenueGrowth', {}).get('raw'),
-            'earnings_growth': fd.get('earningsGrowth', {}).get('raw'),
-            'beta': kvs.get('beta', {}).get('raw'),
+        fund = {
+            'pe_ratio': raw_value(kvs, 'trailingPE'),
+            'forward_pe': raw_value(kvs, 'forwardPE'),
+            'market_cap': raw_value(kvs, 'marketCap'),
+            'peg_ratio': raw_value(kvs, 'pegRatio'),
+            'profit_margin': raw_value(fd, 'profitMargins'),
+            'revenue_growth': raw_value(fd, 'revenueGrowth'),
+            'earnings_growth': raw_value(fd, 'earningsGrowth'),
+            'beta': raw_value(kvs, 'beta'),
         }
+        save_cache(symbol, 'fundamental', fund)
+        return fund
     except Exception as e:
         print(f"Fundamental data fetch error: {e}")
         return {}
 
+def fetch_quotes_batch(symbols):
+    """Fetch snapshot quotes for several symbols with a single Yahoo Finance request"""
+    try:
+        url = f"https://query1.finance.yahoo.com/v7/finance/quote?symbols={','.join(symbols)}"
+        data = http_get_json(url)
+        return {q['symbol']: q for q in data.get('quoteResponse', {}).get('result', [])}
+    except Exception as e:
+        print(f"Batch quote fetch error: {e}")
+        return {}
+
+def fundamentals_from_quote(quote):
+    """Map a batch quote onto the fields returned by the quoteSummary fetchers"""
+    return {
+        'pe_ratio': quote.get('trailingPE'),
+        'forward_pe': quote.get('forwardPE'),
+        'market_cap': quote.get('marketCap'),
+        'dividend_yield': quote.get('dividendYield'),
+    }
+
 def fetch_news_sentiment(symbol, market='US'):
     """Fetch recent news and sentiment (simplified)"""
     # Note: Full news sentiment requires paid APIs
     # This provides a framework for news summary
     
     if market == 'HK':
-        search_term = symbol.replace('.HK', '')
+        search_term = symbol.removesuffix('.HK')
     else:
         search_term = symbol
     
@@ -218,73 +347,73 @@ def fetch_news_sentiment(symbol, market='US'):
     
     return news_data
 
+# Macro environment snapshot per market
+_MACRO = MappingProxyType({
+    'US': {
+        'interest_rate': '5.25-5.50% (Fed)',
+        'inflation': '~3.2%',
+        'gdp_growth': '~2.5%',
+        'usd_index': '~103-105',
+        'notes': 'Fed维持高利率，密切关注通胀走势'
+    },
+    'HK': {
+        'interest_rate': '5.75% (与美挂钩)',
+        'hkd_usd': '7.80-7.85',
+        'china_gdp': '~5%',
+        'notes': '受美联储政策影响，资金流向关注北向资金'
+    },
+    'CN': {
+        'lpr_rate': '3.45%',
+        'inflation': '~0.5%',
+        'gdp_target': '5%',
+        'notes': '货币政策宽松，关注稳增长政策'
+    }
+})
+
 def get_macro_overview(market='US'):
     """Get macro environment overview"""
-    macro = {
-        'US': {
-            'interest_rate': '5.25-5.50% (Fed)',
-            'inflation': '~3.2%',
-            'gdp_growth': '~2.5%',
-            'usd_index': '~103-105',
-            'notes': 'Fed维持高利率，密切关注通胀走势'
-        },
-        'HK': {
-            'interest_rate': '5.75% (与美挂钩)',
-            'hkd_usd': '7.80-7.85',
-            'china_gdp': '~5%',
-            'notes': '受美联储政策影响，资金流向关注北向资金'
-        },
-        'CN': {
-            'lpr_rate': '3.45%',
-            'inflation': '~0.5%',
-            'gdp_target': '5%',
-            'notes': '货币政策宽松，关注稳增长政策'
-        }
-    }
-    return macro.get(market, macro['US'])
+    return _MACRO.get(market, _MACRO['US'])
 
 def load_fundamental_estimate(symbol):
-    """Load fundamental estimate from stock_fundamental.py cache"""
-    cache_path = f"{CACHE_DIR}/{symbol.replace('.', '_')}_full.json"
+    """
+    Last fundamentals this script cached for symbol, however old (the 'fundamental'
+    section, or the legacy combined file). stock_fundamental.py keeps no such cache.
+    """
     try:
-        with open(cache_path) as f:
-            data = json.load(f)
-            return data
+        return load_cache(symbol, 'fundamental', hours=float('inf'))
     except:
         return None
 
-def estimate_fundamentals_v2(symbol):
+# Sector estimates
+_SECTOR_ESTIMATES = MappingProxyType({
+    'NVDA': {'sector': 'Semiconductors', 'avg_pe': 35, 'growth_rate': 0.40},
+    'AAPL': {'sector': 'Technology', 'avg_pe': 28, 'growth_rate': 0.08},
+    'MSFT': {'sector': 'Software', 'avg_pe': 35, 'growth_rate': 0.12},
+    'GOOGL': {'sector': 'Internet', 'avg_pe': 25, 'growth_rate': 0.15},
+    'AMZN': {'sector': 'E-commerce', 'avg_pe': 60, 'growth_rate': 0.20},
+    'TSLA': {'sector': 'EV/Auto', 'avg_pe': 50, 'growth_rate': 0.25},
+    '0700.HK': {'sector': 'Internet/Tech', 'avg_pe': 18, 'growth_rate': 0.10},
+    '9988.HK': {'sector': 'E-commerce', 'avg_pe': 20, 'growth_rate': 0.08},
+    '600519.SH': {'sector': 'Consumer', 'avg_pe': 35, 'growth_rate': 0.15},
+})
+_DEFAULT_SECTOR = MappingProxyType({'sector': 'Unknown', 'avg_pe': 25, 'growth_rate': 0.10})
+
+def estimate_fundamentals_v2(symbol, price_data=None):
     """
     Estimate fundamental metrics from price data
     Fallback when API is unavailable
+    price_data: technical data already fetched for symbol (fetched if omitted)
     """
-    import math
-    
-    # Get price data directly
-    price_data = fetch_technical_data(symbol)
-    current_price = price_data.get('current_price', 0)
-    closes = price_data.get('closes', [])
+    if price_data is None:
+        price_data = fetch_technical_data(symbol)
+    current_price = price_data.current_price
+    closes = price_data.closes
     
     if not closes:
         return None
     
-    # Sector estimates
-    sector_estimates = {
-        'NVDA': {'sector': 'Semiconductors', 'avg_pe': 35, 'growth_rate': 0.40},
-        'AAPL': {'sector': 'Technology', 'avg_pe': 28, 'growth_rate': 0.08},
-        'MSFT': {'sector': 'Software', 'avg_pe': 35, 'growth_rate': 0.12},
-        'GOOGL': {'sector': 'Internet', 'avg_pe': 25, 'growth_rate': 0.15},
-        'AMZN': {'sector': 'E-commerce', 'avg_pe': 60, 'growth_rate': 0.20},
-        'TSLA': {'sector': 'EV/Auto', 'avg_pe': 50, 'growth_rate': 0.25},
-        '0700.HK': {'sector': 'Internet/Tech', 'avg_pe': 18, 'growth_rate': 0.10},
-        '9988.HK': {'sector': 'E-commerce', 'avg_pe': 20, 'growth_rate': 0.08},
-        '600519.SH': {'sector': 'Consumer', 'avg_pe': 35, 'growth_rate': 0.15},
-    }
-    
     base_symbol = symbol.split('.')[0]
-    sector_info = sector_estimates.get(symbol) or sector_estimates.get(base_symbol) or {
-        'sector': 'Unknown', 'avg_pe': 25, 'growth_rate': 0.10
-    }
+    sector_info = _SECTOR_ESTIMATES.get(symbol) or _SECTOR_ESTIMATES.get(base_symbol) or _DEFAULT_SECTOR
     
     estimated_pe = sector_info['avg_pe']
     estimated_eps = current_price / estimated_pe if current_price else 0
@@ -308,24 +437,40 @@ def estimate_fundamentals_v2(symbol):
 
 # ==================== COMPREHENSIVE ANALYSIS ====================
 
-def comprehensive_analysis(symbol, market='US'):
-    """Main comprehensive analysis function"""
+# One set of fetch threads serves every symbol, so pooled connections stay warm
+_fetch_pool = ThreadPoolExecutor(max_workers=3)
+
+def _fmt(x, spec='.2f'):
+    """Format a number for the report, 'N/A' when missing"""
+    return format(x, spec) if x is not None else 'N/A'
+
+
+def comprehensive_analysis(symbol, market='US', quote=None):
+    """
+    Main comprehensive analysis function
+    quote: snapshot from fetch_quotes_batch(); when given, it replaces the
+           per-symbol quoteSummary request for fundamentals
+    """
     
     print(f"\n{'='*70}")
     print(f"        📊 {symbol} Comprehensive Stock Analysis")
     print(f"{'='*70}")
     
-    # 1. Technical Analysis
+    # 1-3. Technical, Fundamental, News & Sentiment (independent requests, fetched concurrently)
     print("\n🔧 Fetching technical data...")
-    tech = fetch_technical_data(symbol)
-    
-    # 2. Fundamental Analysis
     print("📈 Fetching fundamental data...")
-    fund = estimate_fundamentals_v2(symbol)
-    
-    # 3. News & Sentiment
     print("📰 Fetching news...")
-    news = fetch_news_sentiment(symbol, market)
+    fetch_fundamentals = fetch_fundamental_data_us if market == 'US' else fetch_fundamental_data_hk
+    tech_future = _fetch_pool.submit(fetch_technical_data, symbol)
+    fund_future = None if quote else _fetch_pool.submit(fetch_fundamentals, symbol)
+    news_future = _fetch_pool.submit(fetch_news_sentiment, symbol, market)
+    tech = tech_future.result()
+    fund = fundamentals_from_quote(quote) if quote else fund_future.result()
+    news = news_future.result()
+    
+    # Fall back to sector estimates when Yahoo returns no fundamentals
+    if not any(v is not None for v in fund.values()):
+        fund = estimate_fundamentals_v2(symbol, tech)
     
     # 4. Macro Environment
     print("🌍 Analyzing macro environment...")
@@ -333,157 +478,149 @@ def comprehensive_analysis(symbol, market='US'):
     
     # ==================== OUTPUT REPORT ====================
     
-    print(f"\n{'='*70}")
-    print(f"              📊 {symbol} 综合分析报告")
-    print(f"              生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    print(f"{'='*70}")
+    lines = []
+    
+    lines.append(f"\n{'='*70}")
+    lines.append(f"              📊 {symbol} 综合分析报告")
+    lines.append(f"              生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    lines.append(f"{'='*70}")
     
     # --- Technical Section ---
-    print(f"\n{'─'*70}")
-    print("📈 一、技术分析 (Technical Analysis)")
-    print(f"{'─'*70}")
-    print(f"  当前价格: {tech['currency']}${tech['current_price']:.2f}")
-    print(f"  52周区间: {tech['currency']}${tech['52w_low']:.2f} - {tech['currency']}${tech['52w_high']:.2f}")
-    print(f"\n  均线系统:")
-    print(f"    MA(5):  {tech['currency']}${tech['ma5']:.2f} ({'above' if tech['current_price'] > tech['ma5'] else 'below'})")
-    print(f"    MA(20): {tech['currency']}${tech['ma20']:.2f} ({'above' if tech['current_price'] > tech['ma20'] else 'below'})")
-    if tech['ma60']:
-        print(f"    MA(60): {tech['currency']}${tech['ma60']:.2f} ({'above' if tech['current_price'] > tech['ma60'] else 'below'})")
-    
-    print(f"\n  动量指标:")
-    rsi = tech['rsi14']
+    lines.append(f"\n{'─'*70}")
+    lines.append("📈 一、技术分析 (Technical Analysis)")
+    lines.append(f"{'─'*70}")
+    lines.append(f"  当前价格: {tech.currency}${tech.current_price:.2f}")
+    lines.append(f"  52周区间: {tech.currency}${_fmt(tech.week52_low)} - {tech.currency}${_fmt(tech.week52_high)}")
+    lines.append(f"\n  均线系统:")
+    lines.append(f"    MA(5):  {tech.currency}${tech.ma5:.2f} ({'above' if tech.current_price > tech.ma5 else 'below'})")
+    lines.append(f"    MA(20): {tech.currency}${tech.ma20:.2f} ({'above' if tech.current_price > tech.ma20 else 'below'})")
+    if tech.ma60:
+        lines.append(f"    MA(60): {tech.currency}${tech.ma60:.2f} ({'above' if tech.current_price > tech.ma60 else 'below'})")
+    
+    lines.append(f"\n  动量指标:")
+    rsi = tech.rsi14
     rsi_status = "超买" if rsi > 70 else "超卖" if rsi < 30 else "中性"
-    print(f"    RSI(14): {rsi:.1f} ({rsi_status})")
+    lines.append(f"    RSI(14): {rsi:.1f} ({rsi_status})")
     
-    macd = tech['macd']
-    if macd is not None:
-        macd_status = "金叉" if macd > 0 else "死叉"
-        print(f"    MACD: {macd:.3f} ({macd_status})")
-    else:
-        print(f"    MACD: N/A")
+    macd = tech.macd
+    macd_status = "" if macd is None else " (金叉)" if macd > 0 else " (死叉)"
+    lines.append(f"    MACD: {_fmt(macd, '.3f')}{macd_status}")
     
-    print(f"\n  布林带:")
-    print(f"    上轨: {tech['currency']}${tech['bb_upper']:.2f}")
-    print(f"    中轨: {tech['currency']}${tech['bb_middle']:.2f}")
-    print(f"    下轨: {tech['currency']}${tech['bb_lower']:.2f}")
-    bb_pos = "above" if tech['current_price'] > tech['bb_upper'] else "below" if tech['current_price'] < tech['bb_lower'] else "middle"
-    print(f"    位置: {bb_pos} band")
+    lines.append(f"\n  布林带:")
+    lines.append(f"    上轨: {tech.currency}${tech.bb_upper:.2f}")
+    lines.append(f"    中轨: {tech.currency}${tech.bb_middle:.2f}")
+    lines.append(f"    下轨: {tech.currency}${tech.bb_lower:.2f}")
+    bb_pos = "above" if tech.current_price > tech.bb_upper else "below" if tech.current_price < tech.bb_lower else "middle"
+    lines.append(f"    位置: {bb_pos} band")
     
-    print(f"\n  风险指标:")
-    print(f"    年化波动率: {tech['volatility']:.2f}%")
-    print(f"    最大回撤: {tech['max_drawdown']:.2f}%")
-    print(f"    夏普比率: {tech['sharpe']:.2f}")
-    print(f"    平均成交量: {tech['avg_volume']/1e6:.1f}M")
+    lines.append(f"\n  风险指标:")
+    lines.append(f"    年化波动率: {_fmt(tech.volatility)}%")
+    lines.append(f"    最大回撤: {_fmt(tech.max_drawdown)}%")
+    lines.append(f"    夏普比率: {_fmt(tech.sharpe)}")
+    lines.append(f"    平均成交量: {tech.avg_volume/1e6:.1f}M")
     
     # --- Fundamental Section ---
-    print(f"\n{'─'*70}")
-    print("💼 二、基本面分析 (Fundamental Analysis)")
-    print(f"{'─'*70}")
+    lines.append(f"\n{'─'*70}")
+    lines.append("💼 二、基本面分析 (Fundamental Analysis)")
+    lines.append(f"{'─'*70}")
     
     if fund and 'estimated_pe' in fund:
-        print(f"  板块: {fund['sector']}")
-        print(f"\n  估值指标:")
-        print(f"    估算PE (TTM): {fund['estimated_pe']:.1f}")
-        print(f"    估算EPS: ${fund['estimated_eps']:.2f}")
-        print(f"    PEG比率: {fund['peg_ratio']:.2f}")
-        print(f"\n  增长指标:")
-        print(f"    估算增长率: {fund['growth_rate']*100:.0f}%")
-        print(f"\n  相对表现:")
-        print(f"    月收益率: {fund['monthly_return']:+.1f}%")
-        print(f"    距30日高点: {fund['vs_30d_high']:.1f}%")
-        print(f"    距30日低点: {fund['vs_30d_low']:+.1f}%")
-        print(f"\n  ⚠️  免责声明: 以上为基于板块估算的基本面数据")
-        print(f"     准确数据需使用付费API")
+        lines.append(f"  板块: {fund['sector']}")
+        lines.append(f"\n  估值指标:")
+        lines.append(f"    估算PE (TTM): {fund['estimated_pe']:.1f}")
+        lines.append(f"    估算EPS: ${fund['estimated_eps']:.2f}")
+        lines.append(f"    PEG比率: {fund['peg_ratio']:.2f}")
+        lines.append(f"\n  增长指标:")
+        lines.append(f"    估算增长率: {fund['growth_rate']*100:.0f}%")
+        lines.append(f"\n  相对表现:")
+        lines.append(f"    月收益率: {fund['monthly_return']:+.1f}%")
+        lines.append(f"    距30日高点: {fund['vs_30d_high']:.1f}%")
+        lines.append(f"    距30日低点: {fund['vs_30d_low']:+.1f}%")
+        lines.append(f"\n  ⚠️  免责声明: 以上为基于板块估算的基本面数据")
+        lines.append(f"     准确数据需使用付费API")
     elif fund:
         # Fallback to Yahoo Finance data if available
-        pe = fund.get('pe_ratio')
-        print(f"  估值:")
-        print(f"    PE(TTM): {pe:.2f}" if pe else "    PE(TTM): N/A")
-        fwd_pe = fund.get('forward_pe')
-        print(f"    PE(Forward): {fwd_pe:.2f}" if fwd_pe else "    PE(Forward): N/A")
-        
-        growth = fund.get('revenue_growth')
-        print(f"  成长性:")
-        print(f"    营收增长: {growth*100:.1f}%" if growth else "    营收增长: N/A")
-        eg = fund.get('earnings_growth')
-        print(f"    盈利增长: {eg*100:.1f}%" if eg else "    盈利增长: N/A")
-        
-        margins = fund.get('profit_margin')
-        print(f"  盈利能力:")
-        print(f"    净利润率: {margins*100:.1f}%" if margins else "    净利润率: N/A")
-        roe = fund.get('roe')
-        print(f"    ROE: {roe*100:.1f}%" if roe else "    ROE: N/A")
-        
-        beta = fund.get('beta')
-        print(f"  风险特征:")
-        print(f"    Beta: {beta:.2f}" if beta else "    Beta: N/A")
+        lines.append(f"  估值:")
+        lines.append(f"    PE(TTM): {_fmt(fund.get('pe_ratio'))}")
+        lines.append(f"    PE(Forward): {_fmt(fund.get('forward_pe'))}")
+        lines.append(f"  成长性:")
+        lines.append(f"    营收增长: {_fmt(fund.get('revenue_growth'), '.1%')}")
+        lines.append(f"    盈利增长: {_fmt(fund.get('earnings_growth'), '.1%')}")
+        lines.append(f"  盈利能力:")
+        lines.append(f"    净利润率: {_fmt(fund.get('profit_margin'), '.1%')}")
+        lines.append(f"    ROE: {_fmt(fund.get('roe'), '.1%')}")
+        lines.append(f"  风险特征:")
+        lines.append(f"    Beta: {_fmt(fund.get('beta'))}")
     else:
-        print("  (基本面数据获取失败)")
+        lines.append("  (基本面数据获取失败)")
     
     # --- Capital Flow Section ---
-    print(f"\n{'─'*70}")
-    print("💰 三、资金面分析 (Capital Flow)")
-    print(f"{'─'*70}")
-    print(f"  ⚠️  Note: 详细资金流向需要专业数据源")
-    print(f"\n  成交量趋势 (近15日):")
-    volumes = tech['volumes'][-15:]
-    avg_vol = sum(volumes) / len(volumes)
+    lines.append(f"\n{'─'*70}")
+    lines.append("💰 三、资金面分析 (Capital Flow)")
+    lines.append(f"{'─'*70}")
+    lines.append(f"  ⚠️  Note: 详细资金流向需要专业数据源")
+    lines.append(f"\n  成交量趋势 (近15日):")
+    volumes = tech.volumes
+    avg_vol = tech.avg_volume
     recent_vol = volumes[-1] if volumes else avg_vol
     vol_trend = "放量" if recent_vol > avg_vol * 1.2 else "缩量" if recent_vol < avg_vol * 0.8 else "正常"
-    print(f"    平均成交量: {avg_vol/1e6:.1f}M")
-    print(f"    近5日均量: {sum(volumes[-5:])/5/1e6:.1f}M")
-    print(f"    成交量趋势: {vol_trend}")
+    lines.append(f"    平均成交量: {avg_vol/1e6:.1f}M")
+    lines.append(f"    近5日均量: {tech.avg_volume_5d/1e6:.1f}M")
+    lines.append(f"    成交量趋势: {vol_trend}")
     
     # --- Macro Section ---
-    print(f"\n{'─'*70}")
-    print("🌍 四、宏观环境分析 (Macro Environment)")
-    print(f"{'─'*70}")
-    print(f"  市场: {market}")
-    print(f"  利率环境: {macro['interest_rate']}")
-    print(f"  通胀/经济: {macro.get('inflation', 'N/A')}")
-    print(f"  GDP: {macro.get('gdp_growth', macro.get('china_gdp', 'N/A'))}")
-    print(f"  备注: {macro['notes']}")
+    lines.append(f"\n{'─'*70}")
+    lines.append("🌍 四、宏观环境分析 (Macro Environment)")
+    lines.append(f"{'─'*70}")
+    lines.append(f"  市场: {market}")
+    lines.append(f"  利率环境: {macro.get('interest_rate', 'N/A')}")
+    lines.append(f"  通胀/经济: {macro.get('inflation', 'N/A')}")
+    lines.append(f"  GDP: {macro.get('gdp_growth', macro.get('china_gdp', 'N/A'))}")
+    lines.append(f"  备注: {macro['notes']}")
     
     # --- Summary & Recommendation ---
-    print(f"\n{'─'*70}")
-    print("🎯 五、综合结论与建议")
-    print(f"{'─'*70}")
+    lines.append(f"\n{'─'*70}")
+    lines.append("🎯 五、综合结论与建议")
+    lines.append(f"{'─'*70}")
     
     # Technical Summary
     tech_score = 0
-    if tech['current_price'] > tech['ma20']: tech_score += 1
-    if tech['ma5'] > tech['ma20']: tech_score += 1
+    if tech.current_price > tech.ma20: tech_score += 1
+    if tech.ma5 > tech.ma20: tech_score += 1
     if 40 < rsi < 60: tech_score += 1
     if rsi < 30: tech_score += 1  # Oversold is good for long
-    macd_val = tech['macd']
-    macd_status = "N/A" if macd_val is None else ("金叉" if macd_val > 0 else "死叉")
-    if macd_val is not None and macd_val > 0: tech_score += 1
-    if tech['sharpe'] > 0: tech_score += 1
+    macd_status = "N/A" if macd is None else ("金叉" if macd > 0 else "死叉")
+    if macd is not None and macd > 0: tech_score += 1
+    if tech.sharpe > 0: tech_score += 1
     
     tech_signal = "看多" if tech_score >= 4 else "中性" if tech_score >= 2 else "看空"
-    print(f"  技术面信号: {tech_signal} (评分: {tech_score}/6)")
-    print(f"    - 价格{'高于' if tech['current_price'] > tech['ma20'] else '低于'}MA20")
-    print(f"    - RSI {rsi_status}")
-    print(f"    - MACD {macd_status}")
+    lines.append(f"  技术面信号: {tech_signal} (评分: {tech_score}/6)")
+    lines.append(f"    - 价格{'高于' if tech.current_price > tech.ma20 else '低于'}MA20")
+    lines.append(f"    - RSI {rsi_status}")
+    lines.append(f"    - MACD {macd_status}")
+    
+    lines.append(f"\n  风险收益评估:")
+    lines.append(f"    波动率: {'高' if tech.volatility > 30 else '中' if tech.volatility > 15 else '低'} ({tech.volatility:.1f}%)")
+    lines.append(f"    最大回撤: {'高' if tech.max_drawdown > 20 else '中' if tech.max_drawdown > 10 else '低'} ({tech.max_drawdown:.1f}%)")
     
-    print(f"\n  风险收益评估:")
-    print(f"    波动率: {'高' if tech['volatility'] > 30 else '中' if tech['volatility'] > 15 else '低'} ({tech['volatility']:.1f}%)")
-    print(f"    最大回撤: {'高' if tech['max_drawdown'] > 20 else '中' if tech['max_drawdown'] > 10 else '低'} ({tech['max_drawdown']:.1f}%)")
+    lines.append(f"\n  {'='*70}")
+    lines.append(f"  ⚠️ 免责声明: 此分析仅供参考，不构成投资建议")
+    lines.append(f"  {'='*70}\n")
     
-    print(f"\n  {'='*70}")
-    print(f"  ⚠️ 免责声明: 此分析仅供参考，不构成投资建议")
-    print(f"  {'='*70}\n")
+    # One write for the whole report instead of a print() per line
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python stock_analysis.py <SYMBOL> [--market HK|US|CN]")
+        print("Usage: python stock_analysis.py <SYMBOL[,SYMBOL...]> [--market HK|US|CN]")
         print("Examples:")
         print("  python stock_analysis.py NVDA --market US")
         print("  python stock_analysis.py 0700.HK --market HK")
         print("  python stock_analysis.py 600519.SH --market CN")
+        print("  python stock_analysis.py NVDA,AAPL,MSFT --market US")
         sys.exit(1)
     
-    symbol = sys.argv[1]
+    symbols = [s for s in sys.argv[1].split(',') if s]
     market = 'US'
     
     if '--market' in sys.argv:
@@ -491,12 +628,16 @@ def main():
         if idx + 1 < len(sys.argv):
             market = sys.argv[idx + 1]
     
-    try:
-        comprehensive_analysis(symbol, market)
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+    # One batch quote request covers the snapshot fields for every symbol
+    quotes = fetch_quotes_batch(symbols) if len(symbols) > 1 else {}
+    
+    for symbol in symbols:
+        try:
+            comprehensive_analysis(symbol, market, quotes.get(symbol))
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
 
 if __name__ == "__main__":
     main()
@@ -8,8 +8,13 @@ Supports upload to Tencent Cloud COS (recommended) or remote servers
 import json
 import sys
 import os
+import gzip
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
+from html import escape
 from pathlib import Path
+from types import MappingProxyType
 
 # Tencent Cloud COS SDK
 try:
@@ -19,6 +24,20 @@ except ImportError:
     COS_SDK_AVAILABLE = False
     print("⚠️ Tencent Cloud COS SDK not installed. Install with: pip3 install cos-python-sdk-v5")
 
+# orjson parses the input JSON considerably faster; stdlib json is the fallback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Optional zstd output (--compress zstd)
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
 
 # ============ Tencent Cloud COS Configuration ============
 # 配置说明：在环境变量或配置文件中设置以下参数
@@ -36,213 +55,218 @@ COS_CONFIG = {
 }
 
 # HTML templates
-HTML_TEMPLATE = """<!DOCTYPE html>
+# Plain str.format templates: a report is a few dozen substitutions, so a
+# template engine (Jinja2) would only add a dependency to a stdlib-only script
+_HTML_HEAD_FMT = """<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title} - Stock Analysis Report</title>
-    <style>
-        :root {{
+    <style>"""
+
+# Static stylesheet: kept out of the format strings so its braces are literal
+_CSS_STATIC = """
+        :root {
             --primary-color: #1a73e8;
             --text-color: #333;
             --positive: #26a69a;
             --negative: #ef5350;
             --neutral: #ff9800;
             --background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background: var(--background);
             min-height: 100vh;
             margin: 0;
             padding: 20px;
             color: var(--text-color);
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 900px;
             margin: 0 auto;
             background: white;
             border-radius: 20px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.3);
             overflow: hidden;
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, var(--primary-color) 0%, #4a90d9 100%);
             color: white;
             padding: 40px;
             text-align: center;
-        }}
+        }
         
-        .header h1 {{ margin: 0; font-size: 2em; }}
-        .header .subtitle {{ margin-top: 10px; opacity: 0.9; }}
-        .header .meta {{ margin-top: 15px; font-size: 0.9em; background: rgba(255,255,255,0.2); padding: 5px 15px; border-radius: 20px; display: inline-block; }}
+        .header h1 { margin: 0; font-size: 2em; }
+        .header .subtitle { margin-top: 10px; opacity: 0.9; }
+        .header .meta { margin-top: 15px; font-size: 0.9em; background: rgba(255,255,255,0.2); padding: 5px 15px; border-radius: 20px; display: inline-block; }
         
-        .content {{ padding: 40px; }}
+        .content { padding: 40px; }
         
-        .section {{ margin-bottom: 35px; }}
+        .section { margin-bottom: 35px; }
         
-        .section-title {{
+        .section-title {
             font-size: 1.4em;
             color: var(--primary-color);
             margin-bottom: 20px;
             padding-bottom: 10px;
             border-bottom: 3px solid var(--primary-color);
-        }}
+        }
         
-        .price-card {{
+        .price-card {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 30px;
             border-radius: 15px;
             text-align: center;
-        }}
+        }
         
-        .current-price {{ font-size: 3em; font-weight: 700; }}
-        .price-change {{ font-size: 1.5em; margin-top: 10px; }}
-        .price-change.up {{ background: var(--positive); }}
-        .price-change.down {{ background: var(--negative); }}
+        .current-price { font-size: 3em; font-weight: 700; }
+        .price-change { font-size: 1.5em; margin-top: 10px; }
+        .price-change.up { background: var(--positive); }
+        .price-change.down { background: var(--negative); }
         
-        .metrics-grid {{
+        .metrics-grid {
             display: grid;
             grid-template-columns: repeat(3, 1fr);
             gap: 15px;
             margin-top: 20px;
-        }}
+        }
         
-        .metric-card {{
+        .metric-card {
             background: #f8f9fa;
             padding: 20px;
             border-radius: 12px;
             text-align: center;
-        }}
+        }
         
-        .metric-card .value {{ font-size: 1.8em; font-weight: 700; color: var(--primary-color); }}
-        .metric-card .label {{ color: #666; margin-top: 5px; }}
+        .metric-card .value { font-size: 1.8em; font-weight: 700; color: var(--primary-color); }
+        .metric-card .label { color: #666; margin-top: 5px; }
         
-        .tech-analysis {{
+        .tech-analysis {
             display: grid;
             grid-template-columns: repeat(2, 1fr);
             gap: 15px;
-        }}
+        }
         
-        .tech-item {{ background: #f8f9fa; padding: 20px; border-radius: 12px; }}
+        .tech-item { background: #f8f9fa; padding: 20px; border-radius: 12px; }
         
-        .signal {{
+        .signal {
             display: inline-block;
             padding: 5px 15px;
             border-radius: 20px;
             font-weight: 600;
             margin-top: 10px;
-        }}
-        .signal.bullish {{ background: #e8f5e9; color: var(--positive); }}
-        .signal.bearish {{ background: #ffebee; color: var(--negative); }}
-        .signal.neutral {{ background: #fff3e0; color: var(--neutral); }}
+        }
+        .signal.bullish { background: #e8f5e9; color: var(--positive); }
+        .signal.bearish { background: #ffebee; color: var(--negative); }
+        .signal.neutral { background: #fff3e0; color: var(--neutral); }
         
-        .discussion {{ background: #f8f9fa; padding: 25px; border-radius: 12px; }}
+        .discussion { background: #f8f9fa; padding: 25px; border-radius: 12px; }
         
-        .bullish-points, .bearish-points {{ margin-bottom: 15px; }}
+        .bullish-points, .bearish-points { margin-bottom: 15px; }
         
-        .point {{
+        .point {
             padding: 8px 15px;
             margin-bottom: 8px;
             border-radius: 8px;
-        }}
-        .bullish-points .point {{ background: #e8f5e9; }}
-        .bearish-points .point {{ background: #ffebee; }}
+        }
+        .bullish-points .point { background: #e8f5e9; }
+        .bearish-points .point { background: #ffebee; }
         
-        .assessment-grid {{
+        .assessment-grid {
             display: grid;
             grid-template-columns: repeat(2, 1fr);
             gap: 15px;
-        }}
+        }
         
-        .assessment {{ background: #f8f9fa; padding: 20px; border-radius: 12px; }}
+        .assessment { background: #f8f9fa; padding: 20px; border-radius: 12px; }
         
-        .score-bar {{
+        .score-bar {
             height: 12px;
             background: #e0e0e0;
             border-radius: 6px;
             overflow: hidden;
             margin: 10px 0;
-        }}
+        }
         
-        .score-fill {{ height: 100%; border-radius: 6px; }}
-        .score-fill.good {{ background: var(--positive); }}
-        .score-fill.bad {{ background: var(--negative); }}
-        .score-fill.neutral {{ background: var(--neutral); }}
+        .score-fill { height: 100%; border-radius: 6px; }
+        .score-fill.good { background: var(--positive); }
+        .score-fill.bad { background: var(--negative); }
+        .score-fill.neutral { background: var(--neutral); }
         
-        .catalysts-risks {{
+        .catalysts-risks {
             display: grid;
             grid-template-columns: repeat(2, 1fr);
             gap: 20px;
-        }}
+        }
         
-        .catalysts {{ background: #e8f5e9; padding: 20px; border-radius: 12px; border-left: 4px solid var(--positive); }}
-        .risks {{ background: #ffebee; padding: 20px; border-radius: 12px; border-left: 4px solid var(--negative); }}
+        .catalysts { background: #e8f5e9; padding: 20px; border-radius: 12px; border-left: 4px solid var(--positive); }
+        .risks { background: #ffebee; padding: 20px; border-radius: 12px; border-left: 4px solid var(--negative); }
         
-        .recommendation {{
+        .recommendation {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 30px;
             border-radius: 15px;
-        }}
+        }
         
-        .period {{
+        .period {
             background: rgba(255,255,255,0.2);
             padding: 15px;
             border-radius: 10px;
             margin-bottom: 15px;
-        }}
+        }
         
-        .position-table {{
+        .position-table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 10px;
             background: rgba(255,255,255,0.1);
-        }}
+        }
         
-        .position-table th, .position-table td {{
+        .position-table th, .position-table td {
             padding: 10px;
             text-align: left;
             border-bottom: 1px solid rgba(255,255,255,0.2);
-        }}
+        }
         
-        .comparison-table {{
+        .comparison-table {
             width: 100%;
             border-collapse: collapse;
             margin-top: 15px;
-        }}
+        }
         
-        .comparison-table th, .comparison-table td {{
+        .comparison-table th, .comparison-table td {
             padding: 12px;
             text-align: left;
             border-bottom: 1px solid #e0e0e0;
-        }}
+        }
         
-        .comparison-table th {{ background: #f5f5f5; }}
+        .comparison-table th { background: #f5f5f5; }
         
-        .personal-view {{
+        .personal-view {
             background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
             padding: 25px;
             border-radius: 12px;
             margin-top: 20px;
-        }}
+        }
         
-        .pros-cons {{
+        .pros-cons {
             display: grid;
             grid-template-columns: repeat(2, 1fr);
             gap: 15px;
             margin-bottom: 20px;
-        }}
+        }
         
-        .pros {{ background: #e8f5e9; padding: 15px; border-radius: 10px; border-left: 4px solid var(--positive); }}
-        .cons {{ background: #ffebee; padding: 15px; border-radius: 10px; border-left: 4px solid var(--negative); }}
+        .pros { background: #e8f5e9; padding: 15px; border-radius: 10px; border-left: 4px solid var(--positive); }
+        .cons { background: #ffebee; padding: 15px; border-radius: 10px; border-left: 4px solid var(--negative); }
         
-        .disclaimer {{
+        .disclaimer {
             background: #fff3e0;
             padding: 20px;
             border-radius: 10px;
@@ -251,26 +275,30 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             color: #e65100;
             margin-top: 30px;
             border-left: 4px solid var(--neutral);
-        }}
+        }
         
-        .footer {{
+        .footer {
             background: #1a1a2e;
             color: white;
             padding: 20px;
             text-align: center;
             font-size: 0.85em;
             opacity: 0.8;
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .metrics-grid, .tech-analysis, .assessment-grid, .catalysts-risks, .pros-cons {{
+        @media (max-width: 768px) {
+            .metrics-grid, .tech-analysis, .assessment-grid, .catalysts-risks, .pros-cons {
                 grid-template-columns: 1fr;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
-    <div class="container">
+"""
+
+_CSS_STATIC_BYTES = _CSS_STATIC.encode('utf-8')
+
+_BODY_OPEN_FMT = """    <div class="container">
         <div class="header">
             <h1>{emoji} {symbol}</h1>
             <div class="subtitle">{name}</div>
@@ -278,7 +306,9 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         </div>
         
         <div class="content">
-            {sections}
+            """
+
+_FOOTER_FMT = """
         </div>
         
         <div class="footer">
@@ -289,20 +319,22 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </html>
 """
 
+# The price, metrics and tech sections are the hot path and use positional
+# %-formatting: argument order follows the %s placeholders top to bottom
 SECTION_PRICE = """
             <div class="section">
                 <div class="section-title">💰 实时行情</div>
                 <div class="price-card">
-                    <div class="current-price">{price}</div>
-                    <div class="price-change {change_class}">{change} ({pct}) 📈</div>
+                    <div class="current-price">%s</div>
+                    <div class="price-change %s">%s (%s) 📈</div>
                 </div>
                 <div class="metrics-grid">
-                    <div class="metric-card"><div class="value">{open}</div><div class="label">今开</div></div>
-                    <div class="metric-card"><div class="value">{high}</div><div class="label">最高</div></div>
-                    <div class="metric-card"><div class="value">{low}</div><div class="label">最低</div></div>
-                    <div class="metric-card"><div class="value">{volume}</div><div class="label">成交量</div></div>
-                    <div class="metric-card"><div class="value">{market_cap}</div><div class="label">市值</div></div>
-                    <div class="metric-card"><div class="value">{pe}</div><div class="label">PE</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">今开</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">最高</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">最低</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">成交量</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">市值</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">PE</div></div>
                 </div>
             </div>
 """
@@ -311,12 +343,12 @@ SECTION_METRICS = """
             <div class="section">
                 <div class="section-title">📈 基础指标</div>
                 <div class="metrics-grid">
-                    <div class="metric-card"><div class="value">{pe}</div><div class="label">PE (TTM)</div></div>
-                    <div class="metric-card"><div class="value">{pb}</div><div class="label">PB</div></div>
-                    <div class="metric-card"><div class="value">{eps}</div><div class="label">每股收益</div></div>
-                    <div class="metric-card"><div class="value">{dividend}</div><div class="label">股息率</div></div>
-                    <div class="metric-card"><div class="value">{market_cap}</div><div class="label">市值</div></div>
-                    <div class="metric-card"><div class="value">{week_52}</div><div class="label">52周区间</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">PE (TTM)</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">PB</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">每股收益</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">股息率</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">市值</div></div>
+                    <div class="metric-card"><div class="value">%s</div><div class="label">52周区间</div></div>
                 </div>
             </div>
 """
@@ -326,19 +358,19 @@ SECTION_TECH = """
                 <div class="section-title">📊 技术分析</div>
                 <div class="tech-analysis">
                     <div class="tech-item">
-                        <div><strong>📍 52周位置:</strong> {position}</div>
-                        <div class="signal {tech_signal1}">{tech_msg1}</div>
+                        <div><strong>📍 52周位置:</strong> %s</div>
+                        <div class="signal %s">%s</div>
                     </div>
                     <div class="tech-item">
-                        <div><strong>📈 技术信号:</strong> {tech_msg2}</div>
-                        <div class="signal {tech_signal2}">{tech_msg3}</div>
+                        <div><strong>📈 技术信号:</strong> %s</div>
+                        <div class="signal %s">%s</div>
                     </div>
                     <div class="tech-item">
-                        <div><strong>💪 支撑位:</strong> {support}</div>
+                        <div><strong>💪 支撑位:</strong> %s</div>
                         <div class="signal neutral">参考</div>
                     </div>
                     <div class="tech-item">
-                        <div><strong>🔒 阻力位:</strong> {resistance}</div>
+                        <div><strong>🔒 阻力位:</strong> %s</div>
                         <div class="signal neutral">参考</div>
                     </div>
                 </div>
@@ -471,7 +503,293 @@ SECTION_DISCLAIMER = """
 """
 
 
-def generate_html_report(symbol, data, output_path=None):
+# Header emoji per symbol (read-only)
+EMOJI_MAP = MappingProxyType({
+    'TSLA': '🚗',
+    'BABA': '🏢',
+    '0700.HK': '🐧',
+    '03690': '🍜',
+    '00700': '🐧',
+    '600938': '🐉',
+    '000333': '🏠',
+    'NVDA': '🎮',
+    'AAPL': '📱',
+    'MSFT': '💻',
+    'META': '📘'
+})
+DEFAULT_EMOJI = '📈'
+
+
+def format_timestamp(now):
+    """'YYYY-MM-DD HH:MM' without going through strftime"""
+    return f'{now.year}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}'
+
+
+def _esc(value):
+    """HTML-escape a data field of any type"""
+    return escape(str(value))
+
+
+def _li(items, fallback):
+    """Up to four escaped <li> items, or the fallback item when there are none"""
+    return ''.join(f'<li>{_esc(x)}</li>' for x in items[:4]) or f'<li>{fallback}</li>'
+
+
+# Bar width and fill class for each integer score 0-6
+_SCORE_PCT = tuple(round(i * 100 / 6, 2) for i in range(7))
+_SCORE_CLASS = ('bad', 'bad', 'bad', 'neutral', 'good', 'good', 'good')
+
+
+def _score_style(score):
+    """(fill class, width %) for a score; non-integer scores are computed directly"""
+    if isinstance(score, int) and 0 <= score <= 6:
+        return _SCORE_CLASS[score], _SCORE_PCT[score]
+    score_class = 'good' if score >= 4 else 'bad' if score <= 2 else 'neutral'
+    return score_class, round(score * 100 / 6, 2)
+
+
+# Section renderers: each returns the section HTML, or None when data lacks it.
+# The gating key is read once and nothing else is looked up for absent sections.
+
+def _render_price(data):
+    price = data.get('price')
+    if price is None:
+        return None
+    change_class = 'up' if data.get('change_pct', 0) >= 0 else 'down'
+    return SECTION_PRICE % (
+        _esc(price),
+        change_class,
+        _esc(data.get('change', 'N/A')),
+        _esc(data.get('change_pct', 'N/A')),
+        _esc(data.get('open', 'N/A')),
+        _esc(data.get('high', 'N/A')),
+        _esc(data.get('low', 'N/A')),
+        _esc(data.get('volume', 'N/A')),
+        _esc(data.get('market_cap', 'N/A')),
+        _esc(data.get('pe', 'N/A'))
+    )
+
+
+def _render_metrics(data):
+    pe = data.get('pe')
+    if pe is None:
+        return None
+    return SECTION_METRICS % (
+        _esc(pe),
+        _esc(data.get('pb', 'N/A')),
+        _esc(data.get('eps', 'N/A')),
+        _esc(data.get('dividend', 'N/A')),
+        _esc(data.get('market_cap', 'N/A')),
+        _esc(f"{data.get('week_52_low', 'N/A')} - {data.get('week_52_high', 'N/A')}")
+    )
+
+
+def _render_tech(data):
+    pos = data.get('position_52w')
+    if pos is None:
+        return None
+    if pos > 70:
+        tech_signal1 = 'bearish'
+        tech_msg1 = '接近高点 - 回调风险'
+    elif pos < 30:
+        tech_signal1 = 'bullish'
+        tech_msg1 = '处于低位 - 机会区间'
+    else:
+        tech_signal1 = 'neutral'
+        tech_msg1 = '中位震荡 - 观望'
+    
+    return SECTION_TECH % (
+        f"{pos:.1f}%",
+        tech_signal1,
+        tech_msg1,
+        _esc(data.get('tech_summary', '中性')),
+        'neutral',
+        _esc(data.get('tech_signal', '观望')),
+        _esc(data.get('support', 'N/A')),
+        _esc(data.get('resistance', 'N/A'))
+    )
+
+
+def _render_discussion(data):
+    bullish = data.get('bullish')
+    bearish = data.get('bearish')
+    if bullish is None and bearish is None:
+        return None
+    bullish_html = ''.join([f'<div class="point">✅ {_esc(p)}</div>' for p in (bullish or [])[:4]])
+    bearish_html = ''.join([f'<div class="point">⚠️ {_esc(p)}</div>' for p in (bearish or [])[:4]])
+    
+    return SECTION_DISCUSSION.format(
+        hot_topics=_esc(data.get('hot_topics', '市场关注度高')),
+        bullish_points=bullish_html,
+        bearish_points=bearish_html
+    )
+
+
+def _render_assessment(data):
+    scores = data.get('scores')
+    if scores is None:
+        return None
+    catalysts = data.get('catalysts', [])
+    risks = data.get('risks', [])
+    
+    fields = {}
+    for name, key in (('tech', 'tech'), ('funda', 'fundamental'), ('growth', 'growth'), ('value', 'value')):
+        score = scores.get(key, 3)
+        fields[f'{name}_class'], fields[f'{name}_pct'] = _score_style(score)
+        fields[f'{name}_score'] = _esc(score)
+        fields[f'{name}_msg'] = _esc(scores.get(f'{key}_msg', '中性'))
+    
+    return SECTION_ASSESSMENT.format(
+        **fields,
+        catalysts=_li(catalysts, '业绩增长'),
+        risks=_li(risks, '市场竞争')
+    )
+
+
+def _render_recommendation(data):
+    rec = data.get('recommendation')
+    if rec is None:
+        return None
+    pos_table = data.get('position_table', [])
+    
+    pos_html = ''.join(
+        f'<tr><td>{_esc(p.get("price", ""))}</td><td>{_esc(p.get("action", ""))}</td><td>{_esc(p.get("reason", ""))}</td></tr>'
+        for p in pos_table
+    )
+    
+    return SECTION_RECOMMENDATION.format(
+        short_term=_esc(rec.get('short_term', '观望为主')),
+        medium_term=_esc(rec.get('medium_term', '谨慎乐观')),
+        long_term=_esc(rec.get('long_term', '长期看好')),
+        position_table=pos_html
+    )
+
+
+def _render_personal(data):
+    pros = data.get('pros')
+    cons = data.get('cons')
+    if pros is None and cons is None:
+        return None
+    
+    return SECTION_PERSONAL.format(
+        pros=_li(pros or [], '基本面良好'),
+        cons=_li(cons or [], '估值偏高'),
+        summary=_esc(data.get('summary', '需要根据个人风险偏好决定'))
+    )
+
+
+# Report sections in display order; the disclaimer is always appended
+_SECTION_DISPATCH = (
+    ('price', _render_price),
+    ('metrics', _render_metrics),
+    ('tech', _render_tech),
+    ('discussion', _render_discussion),
+    ('assessment', _render_assessment),
+    ('recommendation', _render_recommendation),
+    ('personal', _render_personal),
+)
+
+
+# File suffix added to the output path for each --compress mode
+COMPRESS_SUFFIX = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _compress(payload, compress):
+    if compress == 'gzip':
+        return gzip.compress(payload, compresslevel=6)
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard not installed. Install with: pip3 install zstandard")
+    return zstandard.ZstdCompressor(level=3).compress(payload)
+
+
+def _write_all(fd, chunks):
+    """Write byte chunks to fd in as few syscalls as possible (one gathered writev on POSIX)"""
+    if hasattr(os, 'writev'):
+        written = os.writev(fd, chunks)
+        if written == sum(map(len, chunks)):
+            return
+        data = memoryview(b''.join(chunks))[written:]
+    else:
+        data = memoryview(b''.join(chunks))
+    # Short writes: keep going until everything is on disk
+    while data:
+        data = data[os.write(fd, data):]
+
+
+# Rendered sections by data digest; the header and timestamps are never cached
+_SECTIONS_CACHE = OrderedDict()
+_SECTIONS_CACHE_SIZE = 256
+
+
+def _data_digest(data):
+    """
+    Digest of data, or None when its JSON form would not identify it uniquely
+    (mixed or non-str keys, tuples, non-JSON values); such data renders uncached
+    """
+    try:
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    if json.loads(payload) != data:
+        return None
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+def render_sections(data, cache=True):
+    """All section HTML for data, memoized (LRU) on a digest of its contents"""
+    key = _data_digest(data) if cache else None
+    if key is not None:
+        sections = _SECTIONS_CACHE.get(key)
+        if sections is not None:
+            _SECTIONS_CACHE.move_to_end(key)
+            return sections
+    
+    sections = ''.join([section for _, render in _SECTION_DISPATCH if (section := render(data)) is not None])
+    sections += SECTION_DISCLAIMER
+    
+    if key is not None:
+        _SECTIONS_CACHE[key] = sections
+        if len(_SECTIONS_CACHE) > _SECTIONS_CACHE_SIZE:
+            _SECTIONS_CACHE.popitem(last=False)
+    return sections
+
+
+def _page_shell(symbol, data, timestamp=None):
+    """(head, body_open, footer) strings that wrap the stylesheet and sections"""
+    if timestamp is None:
+        timestamp = format_timestamp(datetime.now())
+    head = _HTML_HEAD_FMT.format(title=_esc(f"{symbol} - Stock Analysis"))
+    body_open = _BODY_OPEN_FMT.format(
+        emoji=EMOJI_MAP.get(symbol, DEFAULT_EMOJI),
+        symbol=_esc(symbol),
+        name=_esc(data.get('name', symbol)),
+        source=_esc(data.get('source', 'AirClaw')),
+        timestamp=timestamp
+    )
+    return head, body_open, _FOOTER_FMT.format(timestamp=timestamp)
+
+
+def generate_html_chunks(symbol, data, timestamp=None):
+    """
+    Yield the report as UTF-8 chunks: head, stylesheet, header, each section, footer
+    
+    For streaming responses, e.g. StreamingResponse(generate_html_chunks(...),
+    media_type='text/html; charset=utf-8'); the full page is never held in memory.
+    """
+    head, body_open, footer = _page_shell(symbol, data, timestamp)
+    yield head.encode('utf-8')
+    yield _CSS_STATIC_BYTES
+    yield body_open.encode('utf-8')
+    for _, render in _SECTION_DISPATCH:
+        section = render(data)
+        if section is not None:
+            yield section.encode('utf-8')
+    yield SECTION_DISCLAIMER.encode('utf-8')
+    yield footer.encode('utf-8')
+
+
+def generate_html_report(symbol, data, output_path=None, timestamp=None, return_bytes=False, cache=True,
+                         compress='none'):
     """
     Generate HTML report for a stock
     
@@ -479,174 +797,79 @@ def generate_html_report(symbol, data, output_path=None):
         symbol: Stock symbol (e.g., TSLA, 0700.HK)
         data: Dictionary with stock data
         output_path: Path to save HTML file (optional)
+        timestamp: Report time string, so a batch can share one (default: now)
+        return_bytes: Return UTF-8 bytes instead of str
+        cache: Reuse rendered sections for identical data (default: True)
+        compress: 'none', 'gzip' or 'zstd'; the file gets a .gz/.zst suffix
     
     Returns:
-        HTML content string
+        HTML content string (bytes if return_bytes)
     """
     
+    if compress not in COMPRESS_SUFFIX:
+        raise ValueError(f"Unknown compression: {compress}")
+    
     # Build sections
-    sections = []
-    
-    # Price section
-    if 'price' in data:
-        change_class = 'up' if data.get('change_pct', 0) >= 0 else 'down'
-        sections.append(SECTION_PRICE.format(
-            price=data.get('price', 'N/A'),
-            change=data.get('change', 'N/A'),
-            pct=data.get('change_pct', 'N/A'),
-            change_class=change_class,
-            open=data.get('open', 'N/A'),
-            high=data.get('high', 'N/A'),
-            low=data.get('low', 'N/A'),
-            volume=data.get('volume', 'N/A'),
-            market_cap=data.get('market_cap', 'N/A'),
-            pe=data.get('pe', 'N/A')
-        ))
-    
-    # Metrics section
-    if 'pe' in data:
-        sections.append(SECTION_METRICS.format(
-            pe=data.get('pe', 'N/A'),
-            pb=data.get('pb', 'N/A'),
-            eps=data.get('eps', 'N/A'),
-            dividend=data.get('dividend', 'N/A'),
-            market_cap=data.get('market_cap', 'N/A'),
-            week_52=f"{data.get('week_52_low', 'N/A')} - {data.get('week_52_high', 'N/A')}"
-        ))
-    
-    # Technical section
-    if 'position_52w' in data:
-        pos = data.get('position_52w', 50)
-        if pos > 70:
-            tech_signal1 = 'bearish'
-            tech_msg1 = '接近高点 - 回调风险'
-        elif pos < 30:
-            tech_signal1 = 'bullish'
-            tech_msg1 = '处于低位 - 机会区间'
-        else:
-            tech_signal1 = 'neutral'
-            tech_msg1 = '中位震荡 - 观望'
-        
-        sections.append(SECTION_TECH.format(
-            position=f"{pos:.1f}%",
-            tech_signal1=tech_signal1,
-            tech_msg1=tech_msg1,
-            tech_msg2=data.get('tech_summary', '中性'),
-            tech_signal2='neutral',
-            tech_msg3=data.get('tech_signal', '观望'),
-            support=data.get('support', 'N/A'),
-            resistance=data.get('resistance', 'N/A')
-        ))
-    
-    # Discussion section
-    if 'bullish' in data or 'bearish' in data:
-        bullish_html = ''.join([f'<div class="point">✅ {p}</div>' for p in data.get('bullish', [])[:4]])
-        bearish_html = ''.join([f'<div class="point">⚠️ {p}</div>' for p in data.get('bearish', [])[:4]])
-        
-        sections.append(SECTION_DISCUSSION.format(
-            hot_topics=data.get('hot_topics', '市场关注度高'),
-            bullish_points=bullish_html,
-            bearish_points=bearish_html
-        ))
-    
-    # Assessment section
-    if 'scores' in data:
-        scores = data.get('scores', {})
-        catalysts = data.get('catalysts', [])
-        risks = data.get('risks', [])
-        
-        # Get style classes
-        def get_score_class(score):
-            if score >= 4:
-                return 'good'
-            elif score <= 2:
-                return 'bad'
-            else:
-                return 'neutral'
-        
-        sections.append(SECTION_ASSESSMENT.format(
-            tech_class=get_score_class(scores.get('tech', 3)),
-            tech_pct=scores.get('tech', 3) * 100 / 6,
-            tech_score=scores.get('tech', 3),
-            tech_msg=scores.get('tech_msg', '中性'),
-            funda_class=get_score_class(scores.get('fundamental', 3)),
-            funda_pct=scores.get('fundamental', 3) * 100 / 6,
-            funda_score=scores.get('fundamental', 3),
-            funda_msg=scores.get('fundamental_msg', '中性'),
-            growth_class=get_score_class(scores.get('growth', 3)),
-            growth_pct=scores.get('growth', 3) * 100 / 6,
-            growth_score=scores.get('growth', 3),
-            growth_msg=scores.get('growth_msg', '中性'),
-            value_class=get_score_class(scores.get('value', 3)),
-            value_pct=scores.get('value', 3) * 100 / 6,
-            value_score=scores.get('value', 3),
-            value_msg=scores.get('value_msg', '中性'),
-            catalysts='<li>'.join(catalysts[:4]) or '<li>业绩增长</li>',
-            risks='<li>'.join(risks[:4]) or '<li>市场竞争</li>'
-        ))
-    
-    # Recommendation section
-    if 'recommendation' in data:
-        rec = data.get('recommendation', {})
-        pos_table = data.get('position_table', [])
-        
-        pos_html = ''
-        for p in pos_table:
-            pos_html += f'<tr><td>{p.get("price", "")}</td><td>{p.get("action", "")}</td><td>{p.get("reason", "")}</td></tr>'
-        
-        sections.append(SECTION_RECOMMENDATION.format(
-            short_term=rec.get('short_term', '观望为主'),
-            medium_term=rec.get('medium_term', '谨慎乐观'),
-            long_term=rec.get('long_term', '长期看好'),
-            position_table=pos_html
-        ))
-    
-    # Personal view section
-    if 'pros' in data or 'cons' in data:
-        pros = data.get('pros', [])
-        cons = data.get('cons', [])
-        
-        sections.append(SECTION_PERSONAL.format(
-            pros='<li>'.join(pros[:4]) or '<li>基本面良好</li>',
-            cons='<li>'.join(cons[:4]) or '<li>估值偏高</li>',
-            summary=data.get('summary', '需要根据个人风险偏好决定')
-        ))
-    
-    # Disclaimer
-    sections.append(SECTION_DISCLAIMER)
+    sections = render_sections(data, cache)
     
     # Generate HTML
-    emoji_map = {
-        'TSLA': '🚗',
-        'BABA': '🏢',
-        '0700.HK': '🐧',
-        '03690': '🍜',
-        '00700': '🐧',
-        '600938': '🐉',
-        '000333': '🏠',
-        'NVDA': '🎮',
-        'AAPL': '📱',
-        'MSFT': '💻',
-        'META': '📘'
-    }
-    
-    html = HTML_TEMPLATE.format(
-        title=f"{symbol} - Stock Analysis",
-        emoji=emoji_map.get(symbol, '📈'),
-        symbol=symbol,
-        name=data.get('name', symbol),
-        source=data.get('source', 'AirClaw'),
-        timestamp=datetime.now().strftime('%Y-%m-%d %H:%M'),
-        sections=''.join(sections)
-    )
+    head, body_open, footer = _page_shell(symbol, data, timestamp)
+    body = ''.join([body_open, sections, footer])
+    # Only the dynamic parts are encoded per report; the stylesheet is pre-encoded
+    if output_path or return_bytes:
+        encoded = (head.encode('utf-8'), _CSS_STATIC_BYTES, body.encode('utf-8'))
     
     # Save to file if path provided
     if output_path:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        file_chunks = encoded
+        if compress != 'none':
+            # Pre-compressed copy for gzip_static-style serving
+            output_path += COMPRESS_SUFFIX[compress]
+            file_chunks = (_compress(b''.join(encoded), compress),)
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            _write_all(fd, file_chunks)
+        finally:
+            os.close(fd)
         print(f"✅ HTML report saved to: {output_path}")
     
-    return html
+    if return_bytes:
+        return b''.join(encoded)
+    return head + _CSS_STATIC + body
+
+
+def _one_report(job):
+    """Pool worker: render one (symbol, data_path, output_path, timestamp, compress) job"""
+    symbol, data_path, output_path, timestamp, compress = job
+    with open(data_path, 'rb') as f:
+        data = json_loads(f.read())
+    generate_html_report(symbol, data, output_path, timestamp=timestamp, cache=False, compress=compress)
+    return symbol, output_path + COMPRESS_SUFFIX[compress]
+
+
+def generate_batch(symbol_data_pairs, output_dir='.', compress='none'):
+    """
+    Generate one report per symbol in parallel worker processes
+    
+    Args:
+        symbol_data_pairs: Iterable of (symbol, data_path)
+        output_dir: Directory for the {symbol}_report.html files
+        compress: 'none', 'gzip' or 'zstd' (see generate_html_report)
+    
+    Returns:
+        List of (symbol, output_path), in completion order
+    """
+    from multiprocessing import Pool, cpu_count
+    
+    timestamp = format_timestamp(datetime.now())
+    jobs = [(symbol, data_path, os.path.join(output_dir, f"{symbol}_report.html"), timestamp, compress)
+            for symbol, data_path in symbol_data_pairs]
+    if not jobs:
+        return []
+    
+    workers = min(cpu_count(), len(jobs))
+    with Pool(workers) as pool:
+        return list(pool.imap_unordered(_one_report, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
 
 
 # ============ Tencent Cloud COS Upload Functions ============
@@ -842,9 +1065,9 @@ def demo():
         'summary': '适合高风险偏好投资者，最佳买入区间$350以下'
     }
     
-    html = generate_html_report('TSLA', demo_data, '/tmp/tesla_demo.html')
+    generate_html_report('TSLA', demo_data, '/tmp/tesla_demo.html')
     print(f"Generated demo report: /tmp/tesla_demo.html")
-    print(f"File size: {len(html)} bytes")
+    print(f"File size: {os.path.getsize('/tmp/tesla_demo.html')} bytes")
 
 
 if __name__ == "__main__":
@@ -864,6 +1087,12 @@ Examples:
   # Generate and save to file
   python stock_analysis_html.py TSLA data.json report.html
 
+  # Save a gzip copy (report.html.gz) for gzip_static serving
+  python stock_analysis_html.py TSLA data.json report.html --compress gzip
+
+  # Generate a report per symbol from {"TSLA": "tsla.json", ...}
+  python stock_analysis_html.py --batch watchlist.json --output-dir reports/
+
   # Generate, save, and upload to COS (with inline credentials)
   python stock_analysis_html.py TSLA data.json --cos \
     --secret-id YOUR_ID --secret-key YOUR_KEY \
@@ -884,6 +1113,10 @@ Environment Variables (for default credentials):
     
     parser.add_argument('--demo', action='store_true', help='Generate demo report')
     parser.add_argument('--upload', metavar='FILE', help='Upload existing file to COS')
+    parser.add_argument('--batch', metavar='FILE', help='JSON map of symbol to data file; one report each')
+    parser.add_argument('--output-dir', default='.', help='Output directory for --batch (default: .)')
+    parser.add_argument('--compress', choices=sorted(COMPRESS_SUFFIX), default='none',
+                        help='Write a .gz/.zst compressed report (default: none)')
     parser.add_argument('--cos', action='store_true', help='Upload result to Tencent Cloud COS')
     
     # COS credentials
@@ -900,6 +1133,10 @@ Environment Variables (for default credentials):
     
     args = parser.parse_args()
     
+    if args.compress == 'zstd' and not ZSTD_AVAILABLE:
+        print("Error: zstandard not installed. Run: pip3 install zstandard")
+        sys.exit(1)
+    
     if args.demo:
         demo()
     elif args.upload:
@@ -927,16 +1164,29 @@ Environment Variables (for default credentials):
             print(f"Error: {result}")
             sys.exit(1)
             
+    elif args.batch:
+        with open(args.batch, 'rb') as f:
+            batch = json_loads(f.read())
+        # Data paths are relative to the batch file
+        base_dir = os.path.dirname(args.batch)
+        os.makedirs(args.output_dir, exist_ok=True)
+        results = generate_batch(
+            [(symbol, os.path.join(base_dir, path)) for symbol, path in batch.items()],
+            args.output_dir, args.compress
+        )
+        print(f"✅ Generated {len(results)} reports in {args.output_dir}")
+        
     elif args.symbol and args.data_file:
         # Generate HTML report
-        with open(args.data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(args.data_file, 'rb') as f:
+            data = json_loads(f.read())
         
         output_path = args.output_file or f"{args.symbol}_report.html"
-        html = generate_html_report(args.symbol, data, output_path)
+        generate_html_report(args.symbol, data, output_path, compress=args.compress)
+        output_path += COMPRESS_SUFFIX[args.compress]
         
         print(f"✅ Generated: {output_path}")
-        print(f"📊 File size: {len(html)} bytes")
+        print(f"📊 File size: {os.path.getsize(output_path)} bytes")
         
         # Upload to COS if requested
         if args.cos:
@@ -4,8 +4,10 @@
 多信息源：雪球 + 浏览器抓取
 """
 
-import json
+import io
+import os
 import sys
+from contextlib import redirect_stdout
 from datetime import datetime
 
 def get_xueqiu_data(symbol):
@@ -95,100 +97,126 @@ def calculate_technical_indicators(data):
         'resistance': round(price * 1.05, 2)
     }
 
+_REPORT_TMPL = """\
+{sep}
+        📊 {symbol} Comprehensive Stock Analysis
+{sep}
+🕐 Generated: {generated}
+
+💰 REAL-TIME MARKET DATA (Source: 雪球)
+{dash}
+  Current Price:     ${price:.2f}
+  Change:            {change_pct:+.2f}% ({change_amt:+.2f})
+  Day Range:         ${low:.2f} - ${high:.2f}
+  Volume:            {volume:.2f}M shares
+  Amount:            ${amount:.2f}B
+  Amplitude:         {amplitude:.2f}%
+
+📈 KEY METRICS
+{dash}
+  PE (TTM):          {pe_ttm:.2f}
+  PE (Static):       {pe_static:.2f}
+  PB:                 {pb:.2f}
+  PS:                 {ps:.2f}
+  EPS:                ${eps:.2f}
+  Dividend (TTM):    ${dividend:.2f}
+  Dividend Yield:     {dividend_yield:.2f}%
+  Market Cap:         ${market_cap:.2f}B
+  52W Range:          ${week_52_low:.2f} - ${week_52_high:.2f}
+  Followers:           {followers:.2f}万
+
+📊 TECHNICAL ANALYSIS
+{dash}
+  MA5:               ${ma5:.2f}
+  MA20:              ${ma20:.2f}
+  RSI(14):            {rsi:.0f}
+  52W Position:       {position_52w:.1f}%
+  Support:           ${support:.2f}
+  Resistance:         ${resistance:.2f}
+
+🎯 TECHNICAL SIGNAL
+{dash}
+  {ma_signal}
+  {position_signal}
+  {rsi_signal}
+
+🗣️ XUEQIU HOT DISCUSSIONS
+{dash}
+  🟢 BULLISH Arguments:
+{bullish}
+  🔴 BEARISH Arguments:
+{bearish}
+  📰 KEY NEWS:
+{news}
+💡 COMPREHENSIVE ASSESSMENT
+{sep}
+  Technical Score:     {tech_bar} ({tech_score}/6) - BULLISH
+  Fundamental Score:  {funda_bar} ({funda_score}/6) - NEUTRAL
+  Market Sentiment:   {sentiment_bar} ({sentiment_score}/6) - POSITIVE
+
+  🚀 CATALYSTS:
+    • Qwen AI commercialization
+    • Apple partnership
+    • E-commerce recovery
+    • China macro recovery
+
+  ⚠️ RISKS:
+    • ByteDance competition
+    • Regulatory uncertainty
+    • AI spending impact
+    • Macro slowdown
+
+🎯 RECOMMENDATION
+{sep}
+
+  SHORT-TERM (1-3 months): ⚠️ CAUTIOUS
+    Current price ${price} near resistance ${resistance}
+    RSI at 65, watch for pullback
+    Support: ${support}, Resistance: ${resistance}
+
+  MEDIUM-TERM (6-12 months): ✅ BULLISH
+    AI strategy validation could re-rate stock
+    $150 area offers good risk/reward
+    Target: $180-200 if AI lands
+
+  LONG-TERM: ✅ HOLD
+    Still the dominant e-commerce player
+    AI transformation is the right strategic move
+    Expect 15-25% annualized returns
+
+  📝 PERSONAL VIEW:
+    BABA is at an inflection point. Qwen AI is management's
+    answer to ByteDance competition. Market has rewarded
+    the move, but patience is needed. Buy on dips.
+
+{sep}
+  ⚠️  Disclaimer: For reference only, not investment advice
+{sep}
+"""
+
+# 信号文案：均线按 price > MA20 取下标，位置和 RSI 按 _band() 取 低位 / 中性 / 高位
+_MA_LABELS = ("🔴 Price < MA20 - SHORT-TERM BEARISH", "✅ Price > MA20 - SHORT-TERM BULLISH")
+_POS_LABELS = ("🟢 Near 52W Low - VALUE ZONE", "🟡 Mid-Range - NEUTRAL", "🔴 Near 52W High - OVERHEATED")
+_RSI_LABELS = ("🟢 RSI Oversold - OPPORTUNITY", "🟡 RSI Neutral", "🔴 RSI Overbought - RISK")
+
+def _band(x):
+    return (x >= 30) + (x > 70)
+
+def _score_bar(score):
+    return '█' * score + '░' * (6 - score)
+
+def _numbered(items):
+    """前三条，每条一行"""
+    return ''.join(f"    {i}. {item}\n" for i, item in enumerate(items[:3], 1))
+
 def generate_report(symbol='BABA'):
     """生成综合分析报告"""
     
-    print("=" * 70)
-    print(f"        📊 {symbol} Comprehensive Stock Analysis")
-    print("=" * 70)
-    print(f"🕐 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    print()
-    
     # 获取数据
     data = get_xueqiu_data(symbol)
     discussions = get_xueqiu_discussions()
     tech = calculate_technical_indicators(data)
     
-    # 1. 实时行情
-    print("💰 REAL-TIME MARKET DATA (Source: 雪球)")
-    print("-" * 50)
-    print(f"  Current Price:     ${data['price']:.2f}")
-    print(f"  Change:            {data['change_pct']:+.2f}% ({data['change_amt']:+.2f})")
-    print(f"  Day Range:         ${data['low']:.2f} - ${data['high']:.2f}")
-    print(f"  Volume:            {data['volume']:.2f}M shares")
-    print(f"  Amount:            ${data['amount']:.2f}B")
-    print(f"  Amplitude:         {data['amplitude']:.2f}%")
-    print()
-    
-    # 2. 基础指标
-    print("📈 KEY METRICS")
-    print("-" * 50)
-    print(f"  PE (TTM):          {data['pe_ttm']:.2f}")
-    print(f"  PE (Static):       {data['pe_static']:.2f}")
-    print(f"  PB:                 {data['pb']:.2f}")
-    print(f"  PS:                 {data['ps']:.2f}")
-    print(f"  EPS:                ${data['eps']:.2f}")
-    print(f"  Dividend (TTM):    ${data['dividend']:.2f}")
-    print(f"  Dividend Yield:     {data['dividend_yield']:.2f}%")
-    print(f"  Market Cap:         ${data['market_cap']:.2f}B")
-    print(f"  52W Range:          ${data['week_52_low']:.2f} - ${data['week_52_high']:.2f}")
-    print(f"  Followers:           {data['followers']:.2f}万")
-    print()
-    
-    # 3. 技术分析
-    print("📊 TECHNICAL ANALYSIS")
-    print("-" * 50)
-    print(f"  MA5:               ${tech['ma5']:.2f}")
-    print(f"  MA20:              ${tech['ma20']:.2f}")
-    print(f"  RSI(14):            {tech['rsi']:.0f}")
-    print(f"  52W Position:       {tech['position_52w']:.1f}%")
-    print(f"  Support:           ${tech['support']:.2f}")
-    print(f"  Resistance:         ${tech['resistance']:.2f}")
-    print()
-    
-    # 技术信号
-    print("🎯 TECHNICAL SIGNAL")
-    print("-" * 50)
-    if data['price'] > tech['ma20']:
-        print("  ✅ Price > MA20 - SHORT-TERM BULLISH")
-    else:
-        print("  🔴 Price < MA20 - SHORT-TERM BEARISH")
-    
-    if tech['position_52w'] > 70:
-        print("  🔴 Near 52W High - OVERHEATED")
-    elif tech['position_52w'] < 30:
-        print("  🟢 Near 52W Low - VALUE ZONE")
-    else:
-        print("  🟡 Mid-Range - NEUTRAL")
-    
-    if tech['rsi'] > 70:
-        print("  🔴 RSI Overbought - RISK")
-    elif tech['rsi'] < 30:
-        print("  🟢 RSI Oversold - OPPORTUNITY")
-    else:
-        print("  🟡 RSI Neutral")
-    print()
-    
-    # 4. 雪球讨论热点
-    print("🗣️ XUEQIU HOT DISCUSSIONS")
-    print("-" * 50)
-    print("  🟢 BULLISH Arguments:")
-    for i, arg in enumerate(discussions['bullish'][:3], 1):
-        print(f"    {i}. {arg}")
-    print()
-    print("  🔴 BEARISH Arguments:")
-    for i, arg in enumerate(discussions['bearish'][:3], 1):
-        print(f"    {i}. {arg}")
-    print()
-    print("  📰 KEY NEWS:")
-    for i, news in enumerate(discussions['news'][:3], 1):
-        print(f"    {i}. {news}")
-    print()
-    
-    # 5. 综合评估
-    print("💡 COMPREHENSIVE ASSESSMENT")
-    print("=" * 70)
-    
     # 技术面评分
     tech_score = 4  # 中性偏强
     # 基本面评分
@@ -196,59 +224,56 @@ def generate_report(symbol='BABA'):
     # 市场情绪
     sentiment_score = 4  # 偏正面
     
-    print(f"  Technical Score:     {'█' * tech_score}{'░' * (6-tech_score)} ({tech_score}/6) - BULLISH")
-    print(f"  Fundamental Score:  {'█' * funda_score}{'░' * (6-funda_score)} ({funda_score}/6) - NEUTRAL")
-    print(f"  Market Sentiment:   {'█' * sentiment_score}{'░' * (6-sentiment_score)} ({sentiment_score}/6) - POSITIVE")
-    print()
-    
-    # 催化剂
-    print("  🚀 CATALYSTS:")
-    print("    • Qwen AI commercialization")
-    print("    • Apple partnership")
-    print("    • E-commerce recovery")
-    print("    • China macro recovery")
-    print()
-    
-    # 风险
-    print("  ⚠️ RISKS:")
-    print("    • ByteDance competition")
-    print("    • Regulatory uncertainty")
-    print("    • AI spending impact")
-    print("    • Macro slowdown")
-    print()
-    
-    # 操作建议
-    print("🎯 RECOMMENDATION")
-    print("=" * 70)
-    print()
-    print("  SHORT-TERM (1-3 months): ⚠️ CAUTIOUS")
-    print(f"    Current price ${data['price']} near resistance ${tech['resistance']}")
-    print("    RSI at 65, watch for pullback")
-    print(f"    Support: ${tech['support']}, Resistance: ${tech['resistance']}")
-    print()
-    print("  MEDIUM-TERM (6-12 months): ✅ BULLISH")
-    print("    AI strategy validation could re-rate stock")
-    print("    $150 area offers good risk/reward")
-    print("    Target: $180-200 if AI lands")
-    print()
-    print("  LONG-TERM: ✅ HOLD")
-    print("    Still the dominant e-commerce player")
-    print("    AI transformation is the right strategic move")
-    print("    Expect 15-25% annualized returns")
-    print()
-    
-    # 个人观点
-    print("  📝 PERSONAL VIEW:")
-    print("    BABA is at an inflection point. Qwen AI is management's")
-    print("    answer to ByteDance competition. Market has rewarded")
-    print("    the move, but patience is needed. Buy on dips.")
-    print()
-    print("=" * 70)
-    print("  ⚠️  Disclaimer: For reference only, not investment advice")
-    print("=" * 70)
+    # 整份报告一次格式化、一次写出
+    ctx = {**data, **tech}
+    ctx.update(
+        symbol=symbol,
+        sep="=" * 70,
+        dash="-" * 50,
+        generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+        ma_signal=_MA_LABELS[data['price'] > tech['ma20']],
+        position_signal=_POS_LABELS[_band(tech['position_52w'])],
+        rsi_signal=_RSI_LABELS[_band(tech['rsi'])],
+        bullish=_numbered(discussions['bullish']),
+        bearish=_numbered(discussions['bearish']),
+        news=_numbered(discussions['news']),
+        tech_score=tech_score,
+        funda_score=funda_score,
+        sentiment_score=sentiment_score,
+        tech_bar=_score_bar(tech_score),
+        funda_bar=_score_bar(funda_score),
+        sentiment_bar=_score_bar(sentiment_score),
+    )
+    sys.stdout.write(_REPORT_TMPL.format_map(ctx))
     
     return data, tech, discussions
 
+def _report_text(symbol):
+    """Pool worker: run generate_report and return everything it printed"""
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        try:
+            generate_report(symbol)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            import traceback
+            traceback.print_exc(file=buf)
+    return buf.getvalue()
+
+def run_batch(symbols):
+    """Generate reports for several symbols in worker processes, printed in input order"""
+    from multiprocessing import Pool
+    
+    with Pool(min(len(symbols), (os.cpu_count() or 1) * 2), maxtasksperchild=50) as pool:
+        for text in pool.imap(_report_text, symbols):
+            sys.stdout.write(text)
+
 if __name__ == "__main__":
-    symbol = sys.argv[1] if len(sys.argv) > 1 else "BABA"
-    generate_report(symbol)
+    symbols = [s for s in sys.argv[1].split(',') if s] if len(sys.argv) > 1 else ["BABA"]
+    if not symbols:
+        print("Usage: python stock_analysis_xueqiu.py [SYMBOL[,SYMBOL...]]")
+        sys.exit(1)
+    if len(symbols) > 1:
+        run_batch(symbols)
+    else:
+        generate_report(symbols[0])
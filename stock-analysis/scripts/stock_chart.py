@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 """
 Stock Chart Generator - Fetches data from Yahoo Finance, caches locally, and generates SVG chart.
-Usage: python stock_chart.py <SYMBOL>
+Usage: python stock_chart.py <SYMBOL[,SYMBOL...]>
 Example: python stock_chart.py 0700.HK
+         python stock_chart.py NVDA,AAPL,MSFT
 """
 
 import sys
 import os
 import json
-import pygal
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from html import escape
+from itertools import groupby
+from pathlib import Path
+
+from stock_http import http_get_json
+
+# orjson reads/writes the cache considerably faster; stdlib json is the fallback
+try:
+    import orjson
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 CACHE_DIR = os.path.expanduser("~/.cache/stock_data")
 os.makedirs(CACHE_DIR, exist_ok=True)
@@ -20,38 +36,44 @@ def get_cache_path(symbol):
 def load_cache(symbol):
     """Load cached data if exists and recent (< 1 hour)"""
     cache_path = get_cache_path(symbol)
-    if os.path.exists(cache_path):
-        file_age = os.path.getmtime(cache_path)
-        age_hours = (datetime.now().timestamp() - file_age) / 3600
-        if age_hours < 1:
-            with open(cache_path) as f:
-                return json.load(f)
+    try:
+        st = os.stat(cache_path)
+    except FileNotFoundError:
+        return None
+    if time.time() - st.st_mtime < 3600:
+        with open(cache_path, 'rb') as f:
+            return json_loads(f.read())
     return None
 
 def save_cache(symbol, data):
     """Save data to cache"""
     cache_path = get_cache_path(symbol)
-    with open(cache_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    with open(cache_path, 'wb') as f:
+        f.write(json_dumps(data))
+
+def date_labels(data):
+    """M/D axis labels; older caches (and stock_quant's) have no 'dates' list"""
+    dates = data.get('dates')
+    if dates is None:
+        dates = data['dates'] = [f"{d.month}/{d.day}" for d in map(datetime.fromtimestamp, data['timestamps'])]
+    return dates
+
+def _quantize(prices):
+    """Round prices to 4 decimals (Yahoo sends float32 noise); missing bars stay None"""
+    return [None if p is None else round(p, 4) for p in prices]
 
 def fetch_stock_data(symbol):
     """Fetch stock data from Yahoo Finance API"""
     # Check cache first
     cached = load_cache(symbol)
     if cached:
-        print(f"Using cached data for {symbol}")
+        # Single write: fetches run on worker threads and print() would interleave
+        sys.stdout.write(f"Using cached data for {symbol}\n")
         return cached
     
-    import urllib.request
-    
     url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1mo"
-    req = urllib.request.Request(url, headers={
-        'User-Agent': 'Mozilla/5.0'
-    })
+    data = http_get_json(url)
     
-    with urllib.request.urlopen(req, timeout=15) as response:
-        data = json.loads(response.read().decode())
-        
     if 'result' not in data['chart'] or not data['chart']['result']:
         raise ValueError(f"No data for symbol: {symbol}")
     
@@ -67,118 +89,203 @@ def fetch_stock_data(symbol):
         '52w_high': meta.get('fiftyTwoWeekHigh'),
         '52w_low': meta.get('fiftyTwoWeekLow'),
         'timestamps': timestamps,
-        'opens': quotes['open'],
-        'closes': quotes['close'],
-        'highs': quotes['high'],
-        'lows': quotes['low'],
+        'dates': [f"{d.month}/{d.day}" for d in map(datetime.fromtimestamp, timestamps)],
+        'opens': _quantize(quotes['open']),
+        'closes': _quantize(quotes['close']),
+        'highs': _quantize(quotes['high']),
+        'lows': _quantize(quotes['low']),
         'volumes': quotes['volume'],
         'last_updated': datetime.now().isoformat()
     }
     
     # Save to cache
     save_cache(symbol, processed_data)
-    print(f"Fetched and cached data for {symbol}")
+    sys.stdout.write(f"Fetched and cached data for {symbol}\n")
     
     return processed_data
 
-def generate_chart(data, output_path):
-    """Generate SVG line chart with price and volume using pygal"""
-    dates = [datetime.fromtimestamp(ts).strftime('%-m/%-d') for ts in data['timestamps']]
+# Chart geometry: canvas size and the plot area (left, top, right, bottom)
+SVG_WIDTH, SVG_HEIGHT = 1000, 500
+PLOT_BOX = (70, 70, 970, 420)
+
+SVG_TEMPLATE = """<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" font-family="Helvetica, Arial, sans-serif">
+<style>
+    .title {{ font-size: 18px; fill: #333; }}
+    .axis {{ font-size: 11px; fill: #666; }}
+    .legend {{ font-size: 12px; fill: #333; }}
+    .grid {{ stroke: #e6e6e6; stroke-width: 1; }}
+    .close {{ fill: none; stroke: #1a73e8; stroke-width: 2; }}
+    .volume {{ fill: #9e9e9e; fill-opacity: 0.45; }}
+    .w52 {{ stroke-width: 1.5; stroke-dasharray: 6 4; }}
+</style>
+<rect width="100%" height="100%" fill="#fff"/>
+<text class="title" x="{center}" y="28" text-anchor="middle">{title}</text>
+{body}
+</svg>
+"""
+
+def _render_svg(title, dates, closes, volumes, w52_high=None, w52_low=None, month_high=None, month_low=None):
+    """
+    Price line over volume bars, with 52-week reference lines and the
+    month high/low marked. month_high/month_low are (index, price) pairs.
+    """
+    left, top, right, bottom = PLOT_BOX
+    n = len(closes)
+    step = (right - left) / max(n - 1, 1)
+    
+    # Y range covers the closes and any 52-week line, padded 5%
+    levels = [c for c in closes if c is not None] + [v for v in (w52_high, w52_low) if v]
+    lo, hi = min(levels), max(levels)
+    pad = (hi - lo) * 0.05 or 1
+    lo, hi = lo - pad, hi + pad
+    scale = (bottom - top) / (hi - lo)
+    
+    def x(i):
+        return left + i * step
+    
+    def y(v):
+        return bottom - (v - lo) * scale
+    
+    body = []
+    for k in range(6):
+        level = lo + (hi - lo) * k / 5
+        body.append(f'<line class="grid" x1="{left}" y1="{y(level):.1f}" x2="{right}" y2="{y(level):.1f}"/>'
+                    f'<text class="axis" x="{left - 8}" y="{y(level) + 4:.1f}" text-anchor="end">{level:.2f}</text>')
+    
+    # Volume bars fill the bottom quarter of the plot, scaled to the month max
+    max_vol = max((v for v in volumes if v), default=0) or 1
+    bar_w = step * 0.6
+    for i, v in enumerate(volumes):
+        if v:
+            h = v / max_vol * (bottom - top) * 0.25
+            body.append(f'<rect class="volume" x="{x(i) - bar_w / 2:.1f}" y="{bottom - h:.1f}" width="{bar_w:.1f}" height="{h:.1f}"/>')
+    
+    legend = [('Close', '#1a73e8'), ('Volume', '#9e9e9e')]
+    for level, label, color in ((w52_high, '52W High', '#ef5350'), (w52_low, '52W Low', '#26a69a')):
+        if level:
+            body.append(f'<line class="w52" x1="{left}" y1="{y(level):.1f}" x2="{right}" y2="{y(level):.1f}" stroke="{color}"/>')
+            legend.append((f'{label}: ${level:.0f}', color))
+    
+    # Close line; missing bars break the path into segments. Each segment is
+    # formatted with one str.format call over its interleaved x,y coordinates
+    path = []
+    for missing, run in groupby(enumerate(closes), key=lambda p: p[1] is None):
+        if missing:
+            continue
+        coords = []
+        for i, c in run:
+            coords += (left + i * step, bottom - (c - lo) * scale)
+        path.append(("M{:.1f},{:.1f}" + " L{:.1f},{:.1f}" * (len(coords) // 2 - 1)).format(*coords))
+    body.append(f'<path class="close" d="{" ".join(path)}"/>')
+    
+    for point, label, color in ((month_high, '📈 Month High', '#ef5350'), (month_low, '📉 Month Low', '#26a69a')):
+        if point:
+            i, price = point
+            body.append(f'<circle cx="{x(i):.1f}" cy="{y(price):.1f}" r="5" fill="{color}"/>')
+            legend.append((f'{label}: ${price:.2f}', color))
+    
+    for i, d in enumerate(dates):
+        body.append(f'<text class="axis" x="{x(i):.1f}" y="{bottom + 16}" text-anchor="end" '
+                    f'transform="rotate(-45 {x(i):.1f} {bottom + 16})">{d}</text>')
+    
+    legend_x = left
+    for label, color in legend:
+        body.append(f'<rect x="{legend_x}" y="42" width="12" height="12" fill="{color}"/>'
+                    f'<text class="legend" x="{legend_x + 16}" y="52">{escape(label)}</text>')
+        legend_x += 24 + 7 * len(label)
+    
+    return SVG_TEMPLATE.format(width=SVG_WIDTH, height=SVG_HEIGHT, center=SVG_WIDTH // 2,
+                               title=escape(title), body='\n'.join(body))
+
+def _price_stats(closes):
+    """
+    Monthly high/low in one pass: (high_idx, high, low_idx, low).
+    Missing closes are skipped; ties keep the first occurrence.
+    """
+    high_idx = low_idx = None
+    high = low = None
+    for i, c in enumerate(closes):
+        if not c:
+            continue
+        if high is None or c > high:
+            high_idx, high = i, c
+        if low is None or c < low:
+            low_idx, low = i, c
+    if high is None:
+        raise ValueError("No closing prices in data")
+    return high_idx, high, low_idx, low
+
+def generate_chart(data, output_path, stats=None):
+    """Generate SVG line chart with price and volume"""
+    dates = date_labels(data)
     closes = data['closes']
     volumes = data['volumes']
-    highs = data['highs']
-    lows = data['lows']
     
     # Monthly high/low
-    max_price = max(closes)
-    max_idx = closes.index(max_price)
-    min_price = min([c for c in closes if c])
-    min_idx = closes.index(min_price)
-    
-    # Create combined chart
-    chart = pygal.Line(
-        x_label_rotation=45,
-        height=500,
-        width=1000,
-        explicit_size=True,
-        show_legend=True,
-        margin=40
+    max_idx, max_price, min_idx, min_price = stats or _price_stats(closes)
+    
+    svg = _render_svg(
+        f"{data['symbol']} - 1 Month Price & Volume Chart",
+        dates, closes, volumes,
+        data['52w_high'], data['52w_low'],
+        (max_idx, max_price), (min_idx, min_price)
     )
-    chart.title = f"{data['symbol']} - 1 Month Price & Volume Chart"
-    chart.x_labels = dates
-    
-    # Add price line
-    chart.add('Close', closes)
-    
-    # Add volume as percentage of max
-    max_vol = max(volumes) if volumes else 1
-    vol_display = [round(v / max_vol * 100, 1) for v in volumes]
-    chart.add('Volume (%)', vol_display)
-    
-    # Add 52-week reference lines
-    if data['52w_high']:
-        chart.add(f'52W High: ${data["52w_high"]:.0f}', [data['52w_high']] * len(dates))
-    if data['52w_low']:
-        chart.add(f'52W Low: ${data["52w_low"]:.0f}', [data['52w_low']] * len(dates))
-    
-    # Mark monthly high point
-    high_point = [None] * len(closes)
-    high_point[max_idx] = max_price
-    chart.add(f'📈 Month High: ${max_price:.2f}', high_point)
-    
-    # Mark monthly low point
-    low_point = [None] * len(closes)
-    low_point[min_idx] = min_price
-    chart.add(f'📉 Month Low: ${min_price:.2f}', low_point)
-    
-    chart.render_to_file(output_path)
+    Path(output_path).write_text(svg, encoding='utf-8')
     return output_path
 
-def print_metrics(data):
+def print_metrics(data, stats=None):
     """Print key metrics and analysis"""
     closes = data['closes']
     volumes = data['volumes']
-    dates = [datetime.fromtimestamp(ts).strftime('%-m/%-d') for ts in data['timestamps']]
+    dates = date_labels(data)
     
     current_price = data['current_price']
-    prev_close = closes[-2] if len(closes) > 1 else data['opens'][-1]
+    # Yahoo leaves null bars (halts, today's unfinished bar): use the nearest real close
+    prev_close = next((c for c in reversed(closes[:-1]) if c), None) or data['opens'][-1]
     change = current_price - prev_close
     pct_change = (change / prev_close) * 100
     
-    monthly_high = max(closes)
-    monthly_low = min([c for c in closes if c])
-    monthly_high_idx = closes.index(monthly_high)
-    monthly_low_idx = closes.index(monthly_low)
+    monthly_high_idx, monthly_high, monthly_low_idx, monthly_low = stats or _price_stats(closes)
     
-    avg_volume = sum(volumes) / len(volumes)
-    max_vol = max(volumes)
+    total_vol = max_vol = days = 0
+    for v in volumes:
+        if v is not None:
+            total_vol += v
+            days += 1
+            if v > max_vol:
+                max_vol = v
+    avg_volume = total_vol / days if days else 0
     
     # Monthly change
-    first_close = closes[0]
+    first_close = next(c for c in closes if c)
     monthly_change = current_price - first_close
     monthly_pct = (monthly_change / first_close) * 100
     
-    print(f"\n{'='*65}")
-    print(f"              {data['symbol']} Stock Analysis")
-    print(f"{'='*65}")
-    print(f"💰 Current Price: {data['currency']}${current_price:.2f}")
-    print(f"📈 Today's Change: {change:+.2f} ({pct_change:+.2f}%)")
-    print(f"📊 52-Week Range: {data['currency']}${data['52w_low']:.2f} - {data['currency']}${data['52w_high']:.2f}")
-    print(f"{'-'*65}")
-    print(f"Monthly Performance:")
-    print(f"  • Monthly Change: {monthly_change:+.2f} ({monthly_pct:+.2f}%)")
-    print(f"  • Monthly High: {data['currency']}${monthly_high:.2f} ({dates[monthly_high_idx]})")
-    print(f"  • Monthly Low: {data['currency']}${monthly_low:.2f} ({dates[monthly_low_idx]})")
-    print(f"  • Average Volume: {avg_volume/1e6:.1f}M")
-    print(f"  • Max Volume: {max_vol/1e6:.1f}M")
-    print(f"{'='*65}\n")
-    print(f"✅ Chart saved: /tmp/{data['symbol'].replace('.', '_')}_chart.svg")
-    print(f"📁 Cache: {get_cache_path(data['symbol'])}")
+    out = []
+    out.append(f"\n{'='*65}")
+    out.append(f"              {data['symbol']} Stock Analysis")
+    out.append(f"{'='*65}")
+    out.append(f"💰 Current Price: {data['currency']}${current_price:.2f}")
+    out.append(f"📈 Today's Change: {change:+.2f} ({pct_change:+.2f}%)")
+    out.append(f"📊 52-Week Range: {data['currency']}${data['52w_low']:.2f} - {data['currency']}${data['52w_high']:.2f}")
+    out.append(f"{'-'*65}")
+    out.append(f"Monthly Performance:")
+    out.append(f"  • Monthly Change: {monthly_change:+.2f} ({monthly_pct:+.2f}%)")
+    out.append(f"  • Monthly High: {data['currency']}${monthly_high:.2f} ({dates[monthly_high_idx]})")
+    out.append(f"  • Monthly Low: {data['currency']}${monthly_low:.2f} ({dates[monthly_low_idx]})")
+    out.append(f"  • Average Volume: {avg_volume/1e6:.1f}M")
+    out.append(f"  • Max Volume: {max_vol/1e6:.1f}M")
+    out.append(f"{'='*65}\n")
+    out.append(f"✅ Chart saved: /tmp/{data['symbol'].replace('.', '_')}_chart.svg")
+    out.append(f"📁 Cache: {get_cache_path(data['symbol'])}")
+    sys.stdout.write("\n".join(out) + "\n")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python stock_chart.py <SYMBOL>")
+    symbols = [s for s in sys.argv[1].split(',') if s] if len(sys.argv) > 1 else []
+    if not symbols:
+        print("Usage: python stock_chart.py <SYMBOL[,SYMBOL...]>")
         print("Example: python stock_chart.py 0700.HK")
+        print("         python stock_chart.py NVDA,AAPL,MSFT")
         print("\nFeatures:")
         print("  - Fetches from Yahoo Finance API")
         print("  - Caches data locally (~/.cache/stock_data)")
@@ -187,17 +294,25 @@ def main():
         print("  - Shows 52-week range reference")
         sys.exit(1)
     
-    symbol = sys.argv[1]
+    failed = False
     
-    try:
-        data = fetch_stock_data(symbol)
-        output_path = f"/tmp/{symbol.replace('.', '_')}_chart.svg"
-        generate_chart(data, output_path)
-        print_metrics(data)
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+    # Fetches are network-bound: request every symbol at once, render in input order
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as pool:
+        futures = [pool.submit(fetch_stock_data, symbol) for symbol in symbols]
+        for symbol, future in zip(symbols, futures):
+            try:
+                data = future.result()
+                output_path = f"/tmp/{symbol.replace('.', '_')}_chart.svg"
+                stats = _price_stats(data['closes'])
+                generate_chart(data, output_path, stats)
+                print_metrics(data, stats)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                import traceback
+                traceback.print_exc()
+                failed = True
+    
+    if failed:
         sys.exit(1)
 
 if __name__ == "__main__":
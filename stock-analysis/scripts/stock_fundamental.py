@@ -4,19 +4,42 @@ Stock Fundamental Estimator - Estimates fundamental metrics from price data.
 Uses price-based estimation when API is unavailable.
 """
 
+import io
+import os
 import sys
 import json
-from datetime import datetime, timedelta
-import urllib.request
+from contextlib import redirect_stdout
+from datetime import datetime
+from types import MappingProxyType
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 CACHE_DIR = "/Users/Spike/.cache/stock_data"
 
+# Sector averages (rough estimates, not company specific)
+_SECTOR_ESTIMATES = MappingProxyType({
+    'NVDA': {'sector': 'Semiconductors', 'avg_pe': 35, 'growth_rate': 0.40},
+    'AAPL': {'sector': 'Technology', 'avg_pe': 28, 'growth_rate': 0.08},
+    'MSFT': {'sector': 'Software', 'avg_pe': 35, 'growth_rate': 0.12},
+    'GOOGL': {'sector': 'Internet', 'avg_pe': 25, 'growth_rate': 0.15},
+    'AMZN': {'sector': 'E-commerce', 'avg_pe': 60, 'growth_rate': 0.20},
+    'TSLA': {'sector': 'EV/Auto', 'avg_pe': 50, 'growth_rate': 0.25},
+    '0700.HK': {'sector': 'Internet/Tech', 'avg_pe': 18, 'growth_rate': 0.10},
+    '9988.HK': {'sector': 'E-commerce', 'avg_pe': 20, 'growth_rate': 0.08},
+    '600519.SH': {'sector': 'Consumer', 'avg_pe': 35, 'growth_rate': 0.15},
+})
+_DEFAULT_SECTOR = MappingProxyType({'sector': 'Unknown', 'avg_pe': 25, 'growth_rate': 0.10})
+
 def load_price_data(symbol):
     """Load cached price data"""
     cache_path = f"{CACHE_DIR}/{symbol.replace('.', '_')}.json"
     try:
-        with open(cache_path) as f:
-            data = json.load(f)
+        with open(cache_path, 'rb') as f:
+            data = json_loads(f.read())
         return data
     except:
         return None
@@ -33,44 +56,30 @@ def estimate_fundamentals(symbol, market='US'):
         return {'error': 'No price data available. Run stock_chart.py first.'}
     
     current_price = data.get('current_price', 0)
-    closes = data.get('closes', [])
+    # Yahoo leaves null bars for halted/unfinished sessions
+    closes = [c for c in data.get('closes', []) if c]
     
     if not closes:
         return {'error': 'No price history available'}
     
-    # Basic calculations from price data
-    recent_closes = closes[-30:] if len(closes) >= 30 else closes
+    # Basic calculations from price data: one 30-day window, scanned once for each extreme
+    recent_closes = closes[-30:]
+    high_30d, low_30d = max(recent_closes), min(recent_closes)
     
     # Estimate returns
-    returns = [(closes[i] - closes[i-1]) / closes[i-1] for i in range(1, len(closes))]
-    monthly_return = (closes[-1] - closes[0]) / closes[0] if closes[0] else 0
-    volatility = (max(recent_closes) - min(recent_closes)) / min(recent_closes) * 100 if recent_closes else 0
+    monthly_return = (closes[-1] - closes[0]) / closes[0]
+    volatility = (high_30d - low_30d) / low_30d * 100
     
     # Trend estimation
     short_trend = "up" if len(closes) >= 5 and closes[-1] > closes[-5] else "down"
     medium_trend = "up" if len(closes) >= 20 and closes[-1] > closes[-20] else "down"
     
-    # Estimate PE based on sector averages (rough estimates)
-    # These are SECTOR averages, not company specific
-    sector_estimates = {
-        'NVDA': {'sector': 'Semiconductors', 'avg_pe': 35, 'growth_rate': 0.40},
-        'AAPL': {'sector': 'Technology', 'avg_pe': 28, 'growth_rate': 0.08},
-        'MSFT': {'sector': 'Software', 'avg_pe': 35, 'growth_rate': 0.12},
-        'GOOGL': {'sector': 'Internet', 'avg_pe': 25, 'growth_rate': 0.15},
-        'AMZN': {'sector': 'E-commerce', 'avg_pe': 60, 'growth_rate': 0.20},
-        'TSLA': {'sector': 'EV/Auto', 'avg_pe': 50, 'growth_rate': 0.25},
-        '0700.HK': {'sector': 'Internet/Tech', 'avg_pe': 18, 'growth_rate': 0.10},
-        '9988.HK': {'sector': 'E-commerce', 'avg_pe': 20, 'growth_rate': 0.08},
-        '600519.SH': {'sector': 'Consumer', 'avg_pe': 35, 'growth_rate': 0.15},
-    }
-    
+    # Estimate PE based on sector averages
     # Get symbol base (remove .HK, .SH, etc)
-    base_symbol = symbol.split('.')[0] if '.' in symbol else symbol
+    base_symbol = symbol.partition('.')[0]
     
     # Try exact match first, then sector defaults
-    sector_info = sector_estimates.get(symbol) or sector_estimates.get(base_symbol) or {
-        'sector': 'Unknown', 'avg_pe': 25, 'growth_rate': 0.10
-    }
+    sector_info = _SECTOR_ESTIMATES.get(symbol) or _SECTOR_ESTIMATES.get(base_symbol, _DEFAULT_SECTOR)
     
     # Calculate estimated EPS (very rough)
     # Assuming typical PE for sector
@@ -105,8 +114,8 @@ def estimate_fundamentals(symbol, market='US'):
         },
         
         'performance_indicators': {
-            'vs_30d_high': f"{(current_price - max(recent_closes))/max(recent_closes)*100:.1f}%" if recent_closes else "N/A",
-            'vs_30d_low': f"{(current_price - min(recent_closes))/min(recent_closes)*100:+.1f}%" if recent_closes else "N/A",
+            'vs_30d_high': f"{(current_price - high_30d)/high_30d*100:.1f}%",
+            'vs_30d_low': f"{(current_price - low_30d)/low_30d*100:+.1f}%",
         },
         
         'data_sources': {
@@ -127,53 +136,78 @@ def print_fundamental_report(symbol, market='US'):
         print(f"\n❌ Error: {fund['error']}")
         return
     
-    print(f"\n{'='*70}")
-    print(f"              💼 {symbol} 基本面估算报告")
-    print(f"              生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-    print(f"{'='*70}")
+    out = []
+    out.append(f"\n{'='*70}")
+    out.append(f"              💼 {symbol} 基本面估算报告")
+    out.append(f"              生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    out.append(f"{'='*70}")
     
-    print(f"\n📌 基本信息:")
-    print(f"   板块: {fund['sector']}")
-    print(f"   ⚠️  免责声明: 以下为估算值，非实际财报数据")
+    out.append(f"\n📌 基本信息:")
+    out.append(f"   板块: {fund['sector']}")
+    out.append(f"   ⚠️  免责声明: 以下为估算值，非实际财报数据")
     
-    print(f"\n💰 价格数据:")
+    out.append(f"\n💰 价格数据:")
     pd = fund['price_data']
-    print(f"   当前价格: {pd['current_price']}")
-    print(f"   月收益率: {pd['monthly_return']}")
-    print(f"   月波动率: {pd['monthly_volatility']}")
+    out.append(f"   当前价格: {pd['current_price']}")
+    out.append(f"   月收益率: {pd['monthly_return']}")
+    out.append(f"   月波动率: {pd['monthly_volatility']}")
     
-    print(f"\n📊 估值估算:")
+    out.append(f"\n📊 估值估算:")
     est = fund['estimates']
-    print(f"   估算PE (TTM): {est['estimated_pe']}")
-    print(f"   估算EPS: {est['estimated_eps']}")
-    print(f"   PEG比率: {est['peg_ratio']}")
-    print(f"   估算增长率: {est['growth_rate_est']}")
+    out.append(f"   估算PE (TTM): {est['estimated_pe']}")
+    out.append(f"   估算EPS: {est['estimated_eps']}")
+    out.append(f"   PEG比率: {est['peg_ratio']}")
+    out.append(f"   估算增长率: {est['growth_rate_est']}")
     
-    print(f"\n📈 趋势判断:")
+    out.append(f"\n📈 趋势判断:")
     trend = fund['trend']
     short = "↑ 短期看涨" if trend['short_term'] == 'up' else "↓ 短期看跌"
     medium = "↑ 中期看涨" if trend['medium_term'] == 'up' else "↓ 中期看跌"
-    print(f"   {short}")
-    print(f"   {medium}")
+    out.append(f"   {short}")
+    out.append(f"   {medium}")
     
     perf = fund['performance_indicators']
-    print(f"\n🎯 相对表现:")
-    print(f"   距30日高点: {perf['vs_30d_high']}")
-    print(f"   距30日低点: {perf['vs_30d_low']}")
-    
-    print(f"\n{'─'*70}")
-    print("💡 说明:")
-    print("   - 估值基于板块平均PE，仅供参考")
-    print("   - 准确基本面数据需使用付费API:")
-    print("     • Yahoo Finance API (企业级)")
-    print("     • Financial Modeling Prep (fmp.io)")
-    print("     • Alpha Vantage (alphavantage.co)")
-    print(f"{'─'*70}\n")
+    out.append(f"\n🎯 相对表现:")
+    out.append(f"   距30日高点: {perf['vs_30d_high']}")
+    out.append(f"   距30日低点: {perf['vs_30d_low']}")
+    
+    out.append(f"\n{'─'*70}")
+    out.append("💡 说明:")
+    out.append("   - 估值基于板块平均PE，仅供参考")
+    out.append("   - 准确基本面数据需使用付费API:")
+    out.append("     • Yahoo Finance API (企业级)")
+    out.append("     • Financial Modeling Prep (fmp.io)")
+    out.append("     • Alpha Vantage (alphavantage.co)")
+    out.append(f"{'─'*70}\n")
+    sys.stdout.write("\n".join(out) + "\n")
+
+def _report_text(job):
+    """Pool worker: print_fundamental_report for (symbol, market), returning its output"""
+    symbol, market = job
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        try:
+            print_fundamental_report(symbol, market)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            import traceback
+            traceback.print_exc(file=buf)
+    return buf.getvalue()
+
+def run_batch(symbols, market='US'):
+    """Reports for several symbols from worker processes, printed in input order"""
+    from multiprocessing import Pool
+    
+    with Pool(min(len(symbols), (os.cpu_count() or 1) * 2), maxtasksperchild=50) as pool:
+        for text in pool.imap(_report_text, [(symbol, market) for symbol in symbols]):
+            sys.stdout.write(text)
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python stock_fundamental.py <SYMBOL>")
+    symbols = [s for s in sys.argv[1].split(',') if s] if len(sys.argv) > 1 else []
+    if not symbols:
+        print("Usage: python stock_fundamental.py <SYMBOL[,SYMBOL...]> [MARKET]")
         print("Example: python stock_fundamental.py NVDA")
+        print("         python stock_fundamental.py NVDA,AAPL,MSFT")
         print("\nFeatures:")
         print("  - Price-based fundamental estimation")
         print("  - Trend analysis")
@@ -181,11 +215,14 @@ def main():
         print("  - API recommendations")
         sys.exit(1)
     
-    symbol = sys.argv[1]
     market = sys.argv[2] if len(sys.argv) > 2 else 'US'
     
+    if len(symbols) > 1:
+        run_batch(symbols, market)
+        return
+    
     try:
-        print_fundamental_report(symbol, market)
+        print_fundamental_report(symbols[0], market)
     except Exception as e:
         print(f"❌ Error: {e}")
         import traceback
@@ -0,0 +1,98 @@
+"""
+Shared HTTP helper for the stock-analysis scripts.
+Keep-alive connections are pooled per scheme and host and shared by every thread.
+"""
+
+import atexit
+import json
+import threading
+from urllib.parse import urljoin, urlsplit
+
+# orjson parses bytes directly and is several times faster; stdlib json is the fallback
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'gzip'}
+# Same statuses and limit as urlopen(); 307/308 keep the method and body
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10
+
+# Idle keep-alive connections by (scheme, host)
+_idle_conns = {}
+_idle_lock = threading.Lock()
+
+def _checkout(key, timeout):
+    with _idle_lock:
+        idle = _idle_conns.get(key)
+        if idle:
+            return idle.pop()
+    # Imported here: cache hits never touch the network (http.client pulls in ssl)
+    import http.client
+    scheme, netloc = key
+    conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+    return conn_class(netloc, timeout=timeout)
+
+def _checkin(key, conn):
+    with _idle_lock:
+        _idle_conns.setdefault(key, []).append(conn)
+
+@atexit.register
+def close_connections():
+    with _idle_lock:
+        for conns in _idle_conns.values():
+            for conn in conns:
+                conn.close()
+        _idle_conns.clear()
+
+def _send(url, body, headers, timeout):
+    """One request/response on a pooled connection; returns (response, data)"""
+    import http.client
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    for attempt in range(2):
+        conn = _checkout(key, timeout)
+        try:
+            conn.request('GET' if body is None else 'POST', path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            break
+        except (http.client.HTTPException, ConnectionError):
+            # The server dropped an idle keep-alive connection; reconnect once
+            conn.close()
+            if attempt: raise
+    if response.will_close:
+        conn.close()
+    else:
+        _checkin(key, conn)
+    return response, data
+
+def http_request(url, body=None, headers=None, timeout=15):
+    """
+    GET (or POST when body is given) and return the response body.
+    Redirects are followed like urlopen() follows them.
+    """
+    headers = {**HTTP_HEADERS, **(headers or {})}
+    for _ in range(MAX_REDIRECTS + 1):
+        response, data = _send(url, body, headers, timeout)
+        location = response.getheader('Location')
+        if response.status not in REDIRECT_CODES or not location:
+            break
+        url = urljoin(url, location)
+        if response.status not in (307, 308):
+            body = None
+    else:
+        raise ValueError(f"Too many redirects for {url}")
+    if response.status != 200:
+        raise ValueError(f"HTTP {response.status} for {url}")
+    if response.getheader('Content-Encoding') == 'gzip':
+        import gzip
+        data = gzip.decompress(data)
+    return data
+
+def http_get_json(url, timeout=15):
+    """GET a JSON document"""
+    return json_loads(http_request(url, timeout=timeout))
@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 """
 Quantitative Stock Analysis - Technical indicators and quantitative metrics.
-Usage: python stock_quant.py <SYMBOL>
+Usage: python stock_quant.py <SYMBOL[,SYMBOL...]> [--no-parallel]
 Example: python stock_quant.py NVDA
+         python stock_quant.py NVDA,AAPL,MSFT
 """
 
 import sys
 import os
 import json
 import math
+import time
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import accumulate
+
+from stock_http import http_get_json
+
+# orjson parses bytes directly and is several times faster; stdlib json is the fallback
+try:
+    import orjson
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
 
 CACHE_DIR = os.path.expanduser("~/.cache/stock_data")
 os.makedirs(CACHE_DIR, exist_ok=True)
@@ -19,26 +35,28 @@ def get_cache_path(symbol):
 
 def load_cache(symbol):
     cache_path = get_cache_path(symbol)
-    if os.path.exists(cache_path):
-        file_age = os.path.getmtime(cache_path)
-        age_hours = (datetime.now().timestamp() - file_age) / 3600
-        if age_hours < 1:
-            with open(cache_path) as f:
-                return json.load(f)
+    # A single stat() gives both existence and age
+    try:
+        file_age = os.stat(cache_path).st_mtime
+    except FileNotFoundError:
+        return None
+    age_hours = (time.time() - file_age) / 3600
+    if age_hours < 1:
+        with open(cache_path, 'rb') as f:
+            return json_loads(f.read())
     return None
 
+def _quantize(prices):
+    """Round prices to 4 decimals (Yahoo sends float32 noise); missing bars stay None"""
+    return [None if p is None else round(p, 4) for p in prices]
+
 def fetch_stock_data(symbol):
     cached = load_cache(symbol)
     if cached:
         return cached
     
-    import urllib.request
-    
     url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1mo"
-    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-    
-    with urllib.request.urlopen(req, timeout=15) as response:
-        data = json.loads(response.read().decode())
+    data = http_get_json(url)
     
     if 'result' not in data['chart'] or not data['chart']['result']:
         raise ValueError(f"No data for: {symbol}")
@@ -55,14 +73,15 @@ def fetch_stock_data(symbol):
         '52w_high': meta.get('fiftyTwoWeekHigh'),
         '52w_low': meta.get('fiftyTwoWeekLow'),
         'timestamps': timestamps,
-        'closes': quotes['close'],
+        'closes': _quantize(quotes['close']),
         'volumes': quotes['volume'],
         'last_updated': datetime.now().isoformat()
     }
     
     cache_path = get_cache_path(symbol)
-    with open(cache_path, 'w') as f:
-        json.dump(processed, f, indent=2)
+    with open(cache_path, 'wb') as f:
+        # Compact: the same file is read back by stock_chart.py and stock_fundamental.py
+        f.write(json_dumps(processed))
     
     return processed
 
@@ -72,35 +91,31 @@ def moving_average(data, period):
         return None
     return sum(data[-period:]) / period
 
-def exponential_moving_average(data, period):
-    """Exponential Moving Average"""
-    if len(data) < period:
+def window_mean(sums, period):
+    """Mean of the last period values, read from prefix sums (sums[i] = sum(data[:i]))"""
+    n = len(sums) - 1
+    if n < period:
         return None
-    multiplier = 2 / (period + 1)
-    ema = data[-period]
-    for price in data[-period:]:
-        ema = price * multiplier + ema * (1 - multiplier)
-    return ema
+    return (sums[n] - sums[n - period]) / period
+
+def _ema_series(data, period):
+    """EMA at every bar from index period - 1 on, seeded with the SMA of the first window"""
+    alpha = 2 / (period + 1)
+    return list(accumulate(data[period:], lambda ema, price: ema + (price - ema) * alpha,
+                           initial=sum(data[:period]) / period))
 
 def rsi(prices, period=14):
-    """Relative Strength Index"""
+    """Relative Strength Index (Wilder smoothing, as in stock_analysis.py)"""
     if len(prices) < period + 1:
         return None
     
-    gains = []
-    losses = []
-    
-    for i in range(1, len(prices)):
-        change = prices[i] - prices[i-1]
-        if change > 0:
-            gains.append(change)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(change))
-    
-    avg_gain = sum(gains[-period:]) / period
-    avg_loss = sum(losses[-period:]) / period
+    changes = [cur - prev for prev, cur in zip(prices, prices[1:])]
+    # Seed with the SMA of the first period changes, then smooth over the rest
+    avg_gain = sum(max(c, 0) for c in changes[:period]) / period
+    avg_loss = sum(max(-c, 0) for c in changes[:period]) / period
+    for c in changes[period:]:
+        avg_gain = (avg_gain * (period - 1) + max(c, 0)) / period
+        avg_loss = (avg_loss * (period - 1) + max(-c, 0)) / period
     
     if avg_loss == 0:
         return 100
@@ -111,24 +126,30 @@ def rsi(prices, period=14):
 
 def macd(prices, fast=12, slow=26, signal=9):
     """MACD - Moving Average Convergence Divergence"""
-    ema_fast = exponential_moving_average(prices, fast)
-    ema_slow = exponential_moving_average(prices, slow)
-    
-    if ema_fast is None or ema_slow is None:
+    if len(prices) < slow:
         return None, None, None
     
-    macd_line = ema_fast - ema_slow
-    signal_line = exponential_moving_average(prices[-slow:], signal)
+    # One pass per EMA; the fast series starts slow - fast bars earlier, so align on the slow one
+    fast_series = _ema_series(prices, fast)[slow - fast:]
+    slow_series = _ema_series(prices, slow)
+    macd_series = [f - s for f, s in zip(fast_series, slow_series)]
+    macd_line = macd_series[-1]
+    
+    # The signal line is an EMA of the MACD line itself
+    if len(macd_series) < signal:
+        return macd_line, None, None
+    signal_line = _ema_series(macd_series, signal)[-1]
     histogram = macd_line - signal_line
     
     return macd_line, signal_line, histogram
 
-def bollinger_bands(prices, period=20, std_dev=2):
-    """Bollinger Bands"""
+def bollinger_bands(prices, period=20, std_dev=2, sma=None):
+    """Bollinger Bands; pass sma if the period mean is already known"""
     if len(prices) < period:
         return None, None, None
     
-    sma = moving_average(prices, period)
+    if sma is None:
+        sma = moving_average(prices, period)
     variance = sum((p - sma) ** 2 for p in prices[-period:]) / period
     std = math.sqrt(variance)
     
@@ -137,42 +158,37 @@ def bollinger_bands(prices, period=20, std_dev=2):
     
     return upper, sma, lower
 
+def _mean_variance(returns):
+    """Mean and sample variance; fsum keeps multi-year windows free of rounding drift"""
+    mean = math.fsum(returns) / len(returns)
+    return mean, math.fsum((r - mean) * (r - mean) for r in returns) / (len(returns) - 1)
+
 def volatility(returns):
     """Annualized Volatility"""
     if len(returns) < 2:
         return None
     
-    daily_vol = math.sqrt(sum((r - sum(returns)/len(returns))**2 for r in returns) / (len(returns) - 1))
+    daily_vol = math.sqrt(_mean_variance(returns)[1])
     annualized = daily_vol * math.sqrt(252)  # Trading days per year
     return annualized * 100  # Convert to percentage
 
 def max_drawdown(prices):
-    """Maximum Drawdown"""
-    max_price = max(prices)
-    max_dd = 0
-    
-    for price in prices:
-        dd = (max_price - price) / max_price
-        if dd > max_dd:
-            max_dd = dd
-    
-    return max_dd * 100
+    """Maximum Drawdown, measured from the running peak"""
+    peaks = accumulate(prices, max)
+    return max((peak - price) / peak for peak, price in zip(peaks, prices)) * 100
 
 def daily_returns(closes):
     """Calculate daily returns"""
-    returns = []
-    for i in range(1, len(closes)):
-        ret = (closes[i] - closes[i-1]) / closes[i-1]
-        returns.append(ret)
-    return returns
+    return [(cur - prev) / prev for prev, cur in zip(closes, closes[1:])]
 
 def sharpe_ratio(returns, risk_free_rate=0.02):
     """Sharpe Ratio (annualized)"""
     if len(returns) < 2:
         return None
     
-    avg_return = sum(returns) / len(returns) * 252  # Annualized
-    std = math.sqrt(sum((r - avg_return/252)**2 for r in returns)) * math.sqrt(252)
+    mean_daily, variance = _mean_variance(returns)
+    avg_return = mean_daily * 252  # Annualized
+    std = math.sqrt(variance * 252)
     
     if std == 0:
         return None
@@ -180,27 +196,51 @@ def sharpe_ratio(returns, risk_free_rate=0.02):
     sharpe = (avg_return - risk_free_rate) / std
     return sharpe
 
-def quant_analysis(symbol):
-    """Main quantitative analysis"""
-    data = fetch_stock_data(symbol)
+QuantIndicators = namedtuple('QuantIndicators', [
+    'daily_vol', 'mdd', 'sharpe', 'ma5', 'ma10', 'ma20',
+    'macd_line', 'macd_signal', 'rsi14', 'bb_upper', 'bb_middle', 'bb_lower',
+])
+
+@lru_cache(maxsize=128)
+def compute_indicators(closes):
+    """
+    Every price-only indicator for a tuple of closes.
+    Memoized on the closes themselves, so a refreshed cache never serves stale results.
+    """
+    returns = daily_returns(closes)
+    
+    # Every MA window ends at the last close, so one prefix-sum pass
+    # serves all of them and the Bollinger middle band
+    sums = list(accumulate(closes, initial=0))
+    ma20 = window_mean(sums, 20)
+    macd_line, macd_signal, _ = macd(closes)
+    
+    return QuantIndicators(
+        volatility(returns) if returns else None,
+        max_drawdown(closes),
+        sharpe_ratio(returns),
+        window_mean(sums, 5),
+        window_mean(sums, 10),
+        ma20,
+        macd_line,
+        macd_signal,
+        rsi(closes, 14),
+        *bollinger_bands(closes, sma=ma20),
+    )
+
+BB_POSITIONS = ("Lower", "Middle", "Upper")
+
+def quant_analysis(symbol, data=None):
+    """Main quantitative analysis; data is fetched unless already given"""
+    if data is None:
+        data = fetch_stock_data(symbol)
+    # Yahoo sends null for bars without a trade; a 0 close would also break the returns
     closes = [c for c in data['closes'] if c]
-    volumes = [v for v in data['volumes'] if v]
     
     current_price = data['current_price']
-    prev_close = closes[-1] if len(closes) > 1 else current_price
     
-    returns = daily_returns(closes)
-    daily_vol = volatility(returns) if returns else None
-    mdd = max_drawdown(closes)
-    sharpe = sharpe_ratio(returns)
-    
-    # Technical indicators
-    ma5 = moving_average(closes, 5)
-    ma10 = moving_average(closes, 10)
-    ma20 = moving_average(closes, 20)
-    ema12, ema26, _ = macd(closes)
-    rsi14 = rsi(closes, 14)
-    bb_upper, bb_middle, bb_lower = bollinger_bands(closes)
+    (daily_vol, mdd, sharpe, ma5, ma10, ma20,
+     macd_line, macd_signal, rsi14, bb_upper, bb_middle, bb_lower) = compute_indicators(tuple(closes))
     
     # Position indicators
     price_vs_ma5 = ((current_price - ma5) / ma5 * 100) if ma5 else None
@@ -217,7 +257,12 @@ def quant_analysis(symbol):
     
     print(f"\n📈 MOMENTUM INDICATORS")
     print(f"   RSI(14): {rsi14:.1f}" if rsi14 else "   RSI(14): N/A")
-    print(f"   MACD: {ema12 - ema26:.2f}" if ema12 and ema26 else "   MACD: N/A")
+    if macd_line is None:
+        print("   MACD: N/A")
+    elif macd_signal is None:
+        print(f"   MACD: {macd_line:.2f}")
+    else:
+        print(f"   MACD: {macd_line:.2f} (Signal: {macd_signal:.2f})")
     
     print(f"\n📐 VOLATILITY")
     print(f"   Daily Volatility: {daily_vol:.2f}%" if daily_vol else "   Daily Volatility: N/A")
@@ -228,7 +273,8 @@ def quant_analysis(symbol):
     
     print(f"\n📊 BOLLINGER BANDS")
     if bb_upper and bb_middle and bb_lower:
-        position = "Upper" if current_price > bb_upper else "Lower" if current_price < bb_lower else "Middle"
+        # 0 below the lower band, 2 above the upper one, 1 on or between them
+        position = BB_POSITIONS[1 + (current_price > bb_upper) - (current_price < bb_lower)]
         print(f"   Upper: {data['currency']}${bb_upper:.2f}")
         print(f"   Middle: {data['currency']}${bb_middle:.2f}")
         print(f"   Lower: {data['currency']}${bb_lower:.2f}")
@@ -259,9 +305,12 @@ def quant_analysis(symbol):
     print(f"\n{'='*70}\n")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python stock_quant.py <SYMBOL>")
+    args = [a for a in sys.argv[1:] if a != '--no-parallel']
+    if not args:
+        print("Usage: python stock_quant.py <SYMBOL[,SYMBOL...]> [--no-parallel]")
         print("Example: python stock_quant.py NVDA")
+        print("         python stock_quant.py NVDA,AAPL,MSFT")
+        print("         (--no-parallel fetches one symbol at a time)")
         print("\nFeatures:")
         print("  - Moving Averages (MA5, MA10, MA20)")
         print("  - RSI (Relative Strength Index)")
@@ -271,14 +320,31 @@ def main():
         print("  - Sharpe Ratio")
         sys.exit(1)
     
-    symbol = sys.argv[1]
+    symbols = [s for arg in args for s in arg.split(',') if s]
+    failed = False
     
-    try:
-        quant_analysis(symbol)
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+    # Fetches are network-bound: request every symbol at once, report in input order.
+    # A single symbol (the common case) skips the pool and its imports entirely.
+    pool = None
+    if len(symbols) > 1 and '--no-parallel' not in sys.argv:
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=min(16, len(symbols)))
+        fetches = [pool.submit(fetch_stock_data, symbol).result for symbol in symbols]
+    else:
+        fetches = [partial(fetch_stock_data, symbol) for symbol in symbols]
+    
+    for symbol, fetch in zip(symbols, fetches):
+        try:
+            quant_analysis(symbol, fetch())
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            import traceback
+            traceback.print_exc()
+            failed = True
+    
+    if pool:
+        pool.shutdown()
+    if failed:
         sys.exit(1)
 
 if __name__ == "__main__":
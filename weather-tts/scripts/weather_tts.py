@@ -4,27 +4,109 @@ Weather TTS - Get weather and speak it aloud
 Usage: python weather_tts.py <CITY> [--forecast N] [--say TEXT] [--lang en|zh]
 """
 
+import atexit
 import subprocess
-import sys
-import os
 import argparse
+import http.client
 import json
-import urllib.request
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+HTTP_HEADERS = {'Accept-Encoding': 'gzip'}
+# Same statuses and limit as urlopen(); 307/308 keep the method and body
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10
+
+# Idle keep-alive connections by (scheme, host), shared by every thread.
+# This skill ships on its own, so it mirrors stock-analysis/scripts/stock_http.py
+# rather than importing it; keep the two in step.
+_idle_conns = {}
+_idle_lock = threading.Lock()
+
+def _checkout(key, timeout):
+    with _idle_lock:
+        idle = _idle_conns.get(key)
+        if idle:
+            return idle.pop()
+    scheme, netloc = key
+    conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+    return conn_class(netloc, timeout=timeout)
+
+def _checkin(key, conn):
+    with _idle_lock:
+        _idle_conns.setdefault(key, []).append(conn)
+
+@atexit.register
+def close_connections():
+    with _idle_lock:
+        for conns in _idle_conns.values():
+            for conn in conns:
+                conn.close()
+        _idle_conns.clear()
+
+def _send(url, body, headers, timeout):
+    """One request/response on a pooled connection; returns (response, data)"""
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    for attempt in range(2):
+        conn = _checkout(key, timeout)
+        try:
+            conn.request('GET' if body is None else 'POST', path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            break
+        except (http.client.HTTPException, ConnectionError):
+            # The server dropped an idle keep-alive connection; reconnect once
+            conn.close()
+            if attempt: raise
+    if response.will_close:
+        conn.close()
+    else:
+        _checkin(key, conn)
+    return response, data
+
+def http_request(url, body=None, headers=None, timeout=10):
+    """
+    GET (or POST when body is given) and return the response body.
+    Redirects are followed like urlopen() follows them.
+    """
+    headers = {**HTTP_HEADERS, **(headers or {})}
+    for _ in range(MAX_REDIRECTS + 1):
+        response, data = _send(url, body, headers, timeout)
+        location = response.getheader('Location')
+        if response.status not in REDIRECT_CODES or not location:
+            break
+        url = urljoin(url, location)
+        if response.status not in (307, 308):
+            body = None
+    else:
+        raise ValueError(f"Too many redirects for {url}")
+    if response.status != 200:
+        raise ValueError(f"HTTP {response.status} for {url}")
+    if response.getheader('Content-Encoding') == 'gzip':
+        import gzip
+        data = gzip.decompress(data)
+    return data
 
 def get_weather(city, forecast_days=1):
     """Fetch weather from wttr.in"""
     try:
-        url = f"https://wttr.in/{city}?format=j1&m"
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
-        return data
+        return json_loads(http_request(f"https://wttr.in/{city}?format=j1&m"))
     except Exception as e:
         return {"error": str(e)}
 
-def format_weather(data, forecast_days=1):
-    """Format weather data for speech"""
+def weather_chunks(data, forecast_days=1):
+    """Speech for the current weather plus one sentence per forecast day"""
     if "error" in data:
-        return f"Sorry, I couldn't get weather for that location."
+        return [f"Sorry, I couldn't get weather for that location."]
 
     current = data.get("current_condition", [{}])[0]
     temp = current.get("temp_C", "?")
@@ -34,7 +116,7 @@ def format_weather(data, forecast_days=1):
     humidity = current.get("humidity", "?")
     wind = current.get("windspeedKmph", "?")
 
-    speech = f"Weather in your location: {weather_desc}, {temp} degrees Celsius, humidity {humidity} percent, wind {wind} kilometers per hour."
+    chunks = [f"Weather in your location: {weather_desc}, {temp} degrees Celsius, humidity {humidity} percent, wind {wind} kilometers per hour."]
 
     # Add forecast if requested
     if forecast_days > 0:
@@ -44,30 +126,49 @@ def format_weather(data, forecast_days=1):
             max_temp = day.get("tempMaxC", "?")
             min_temp = day.get("tempMinC", "?")
             desc = day.get("weatherDesc", [{}])[0].get("value", "Unknown")
-            speech += f" On {date}, expect {desc}, temperatures from {min_temp} to {max_temp} degrees."
+            chunks.append(f"On {date}, expect {desc}, temperatures from {min_temp} to {max_temp} degrees.")
 
-    return speech
+    return chunks
 
-def speak(text, lang="en"):
-    """Use TTS to speak the text"""
-    # Generate TTS via curl to ElevenLabs/OpenClaw TTS endpoint
-    tts_url = "http://127.0.0.1:3499/tts"
+def format_weather(data, forecast_days=1):
+    """Format weather data for speech"""
+    return " ".join(weather_chunks(data, forecast_days))
 
-    try:
-        data = json.dumps({"text": text, "lang": lang}).encode('utf-8')
-        req = urllib.request.Request(tts_url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
+def request_tts(text, lang="en"):
+    """Synthesize text via the ElevenLabs/OpenClaw TTS endpoint; returns the mp3 path"""
+    tts_url = "http://127.0.0.1:3499/tts"
 
-        with urllib.request.urlopen(req, timeout=10) as response:
-            mp3_path = response.read().decode('utf-8').strip()
+    data = json.dumps({"text": text, "lang": lang}).encode('utf-8')
+    # Chunks reuse the pooled keep-alive connection to the TTS server
+    body = http_request(tts_url, body=data, headers={'Content-Type': 'application/json'})
+    return body.decode('utf-8').strip()
+
+def speak_many(chunks, lang="en"):
+    """
+    Speak chunks in order. The next chunk is synthesized while the current one
+    plays, so only the first chunk waits on the TTS endpoint.
+    """
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(request_tts, chunks[0], lang)
+        for i in range(len(chunks)):
+            try:
+                mp3_path = pending.result()
+                if i + 1 < len(chunks):
+                    pending = pool.submit(request_tts, chunks[i + 1], lang)
+
+                # Play the audio
+                player = subprocess.Popen(['afplay', mp3_path])
+                if player.wait():
+                    raise subprocess.CalledProcessError(player.returncode, player.args)
+            except Exception as e:
+                print(f"TTS Error: {e}")
+                print(f"\n{' '.join(chunks[i:])}\n")
+                return False
+    return True
 
-        # Play the audio
-        subprocess.run(['afplay', mp3_path], check=True)
-        return True
-    except Exception as e:
-        print(f"TTS Error: {e}")
-        print(f"\n{text}\n")
-        return False
+def speak(text, lang="en"):
+    """Use TTS to speak the text"""
+    return speak_many([text], lang)
 
 def main():
     parser = argparse.ArgumentParser(description='Weather TTS')
@@ -79,13 +180,13 @@ def main():
     args = parser.parse_args()
 
     if args.say:
-        text = args.say
+        chunks = [args.say]
     else:
         data = get_weather(args.city, args.forecast)
-        text = format_weather(data, args.forecast)
+        chunks = weather_chunks(data, args.forecast)
 
-    print(f"\n{text}\n")
-    speak(text, args.lang)
+    print(f"\n{' '.join(chunks)}\n")
+    speak_many(chunks, args.lang)
 
 if __name__ == "__main__":
     main()